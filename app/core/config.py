@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
@@ -12,6 +12,58 @@ class Settings(BaseSettings):
 
     # API behavior configuration
     AUTO_PAGINATION_THRESHOLD: int = 5000
+    # Rows fetched per round trip and written per chunk by streaming exports
+    STREAMING_CHUNK_SIZE: int = 1000
+    # Rows per row group in Parquet exports
+    PARQUET_ROW_GROUP_SIZE: int = 50000
+    # Maximum number of identifiers (accessions, UniProt IDs and gene names together) per bulk search
+    BULK_MAX_IDS: int = 50000
+
+    # Logging configuration
+    LOG_LEVEL: str = "INFO"
+    # Write logs as JSON objects, one per line
+    LOG_JSON: bool = True
+    # Fraction of database queries logged with their SQL and duration, and their log level
+    QUERY_LOG_SAMPLE_RATE: float = 0.01
+    QUERY_LOG_LEVEL: str = "INFO"
+
+    # Result cache configuration
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: float = 300
+    CACHE_MAX_ENTRIES: int = 1024
+    # Total size of the serialized results kept by the in-process cache
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Larger search pages are not cached
+    CACHE_MAX_ENTRY_ROWS: int = 1000
+    # Shared cache backend for multiple replicas (requires the redis package)
+    CACHE_REDIS_URL: Optional[str] = None
+    # Relations whose changes invalidate the cache, and how often they are polled
+    CACHE_VERSION_POLL_SECONDS: float = 60
+    CACHE_VERSION_TABLES: List[str] = [
+        "predictions_uniprot_annot",
+        "predictions_uniprot_annot_clean_ec",
+        "predictions_uniprot_annot_clean_ec_mv01",
+        "predictions_uniprot_annot_ec_mv01",
+        "predictions_uniprot_annot_mv01",
+        "predictions_uniprot_annot_mv02",
+        "predictions_uniprot_annot_mv03",
+        "predictions_uniprot_annot_mv04",
+        "ec_class_names",
+    ]
+
+    # Typeahead configuration
+    # Typeahead totals stop counting at this many matches and are flagged as capped (0 to always count all)
+    TYPEAHEAD_COUNT_CAP: int = 1000
+    # Answer typeahead without search context from an in-memory index of the distinct values
+    # (organism, protein_name, gene_name, predicted_ec) instead of the database. Needs memory in
+    # proportion to the number and length of the distinct values, twice that while it is rebuilt.
+    TYPEAHEAD_INDEX_ENABLED: bool = False
+    TYPEAHEAD_INDEX_FIELDS: List[str] = ["organism", "protein_name", "gene_name", "predicted_ec"]
+    # Answer typeahead whose search context only has curation statuses and a confidence floor
+    # from the rollup view of distinct values per curation status and confidence band
+    # (predictions_uniprot_annot_mv04, created by migration 0004) instead of joining the records.
+    # Only used once the view is populated; it must be refreshed along with the other views.
+    TYPEAHEAD_ROLLUP_ENABLED: bool = True
 
     # CORS configuration
     CORS_ORIGINS: List[str] = ["*"]
@@ -23,6 +75,33 @@ class Settings(BaseSettings):
     CLEAN_DB_PORT: str = "5432"
     CLEAN_DB_NAME: str = "CLEAN_data"
 
+    # Database connection pool configuration
+    CLEAN_DB_POOL_MIN_SIZE: int = 2
+    CLEAN_DB_POOL_MAX_SIZE: int = 10
+    # Seconds after which idle connections are closed (0 to keep them forever)
+    CLEAN_DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
+    # Prepared statements cached per connection (0 to disable)
+    CLEAN_DB_STATEMENT_CACHE_SIZE: int = 256
+    # Seconds before a query is cancelled
+    CLEAN_DB_COMMAND_TIMEOUT: Optional[float] = 60.0
+    # Seconds to wait for a free connection before failing the request
+    CLEAN_DB_POOL_ACQUIRE_TIMEOUT: Optional[float] = 10.0
+    # Share one run of a read query between identical concurrent queries (same SQL and arguments)
+    CLEAN_DB_SINGLE_FLIGHT: bool = True
+
+    # Slow query log configuration
+    # Queries slower than this many milliseconds are logged (negative to disable)
+    SLOW_QUERY_THRESHOLD_MS: float = 500.0
+    # Number of slow queries kept for /admin/slow-queries
+    SLOW_QUERY_LOG_SIZE: int = 100
+    # Fraction of slow SELECT queries re-run with EXPLAIN (ANALYZE, BUFFERS) to capture their plan
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    # Log only the types of bound parameters, not their values
+    SLOW_QUERY_REDACT_PARAMS: bool = True
+
+    # Token required in the X-Admin-Token header by /admin endpoints (disabled if not set)
+    ADMIN_TOKEN: Optional[str] = None
+
     # Database connection string
     @property
     def DATABASE_URL(self) -> str:
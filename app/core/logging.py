@@ -0,0 +1,37 @@
+import random
+import sys
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import current_route
+
+
+def configure_logging() -> None:
+    """Replace the default loguru sink with a non-blocking one.
+
+    Records are queued and written to stderr by a background thread (enqueue=True), so request
+    handlers never wait on console output. With LOG_JSON, each record is written as one JSON
+    object including the fields bound to it (e.g. sql and duration_ms for query logs).
+    """
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=settings.LOG_LEVEL,
+        serialize=settings.LOG_JSON,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
+    )
+
+
+def log_query(query: str, arg_count: int, duration_ms: float) -> None:
+    """Log a sample of executed queries (QUERY_LOG_SAMPLE_RATE) with their SQL and timing."""
+    if random.random() >= settings.QUERY_LOG_SAMPLE_RATE:
+        return
+    logger.bind(
+        sql=" ".join(query.split()),
+        arg_count=arg_count,
+        duration_ms=round(duration_ms, 3),
+        route=current_route(),
+    ).log(settings.QUERY_LOG_LEVEL, f"Query took {duration_ms:.1f} ms")
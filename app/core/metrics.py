@@ -0,0 +1,146 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# ASGI scope of the request being handled, used to label metrics recorded deeper in the stack
+current_scope: ContextVar[dict | None] = ContextVar("current_scope", default=None)
+
+REQUEST_LATENCY = Histogram(
+    "cleandb_request_duration_seconds",
+    "Time to handle a request, including streaming the response body.",
+    ["route", "method", "status"],
+)
+PHASE_LATENCY = Histogram(
+    "cleandb_request_phase_duration_seconds",
+    "Time spent in each phase of handling a request.",
+    ["route", "phase"],
+)
+ROWS_RETURNED = Counter(
+    "cleandb_rows_returned_total",
+    "Rows returned to clients.",
+    ["route"],
+)
+BYTES_SENT = Counter(
+    "cleandb_response_bytes_total",
+    "Response body bytes sent to clients, after compression.",
+    ["route"],
+)
+CACHE_REQUESTS = Counter(
+    "cleandb_cache_requests_total",
+    "Result cache lookups.",
+    ["namespace", "result"],
+)
+STATEMENT_CACHE_REQUESTS = Counter(
+    "cleandb_db_statement_cache_requests_total",
+    "Prepared queries whose statement was in the statement cache of their connection (hit) or not (miss).",
+    ["result"],
+)
+COALESCED_QUERIES = Counter(
+    "cleandb_db_coalesced_queries_total",
+    "Queries that shared the result of an identical query already running instead of running again.",
+)
+POOL_ACQUIRE_LATENCY = Histogram(
+    "cleandb_db_pool_acquire_duration_seconds",
+    "Time spent waiting for a database connection from the pool.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def route_label(scope: dict | None) -> str:
+    """Get the path template of the route matched for a request, or "unmatched".
+
+    Only matched routes are used as labels, so arbitrary paths cannot inflate metric cardinality.
+    """
+    route = scope.get("route") if scope else None
+    return getattr(route, "path", None) or "unmatched"
+
+
+def current_route() -> str:
+    """Get the route label of the request being handled."""
+    return route_label(current_scope.get())
+
+
+@contextmanager
+def observe_phase(phase: str) -> Iterator[None]:
+    """Record the time spent in the body of the with block as a phase of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_LATENCY.labels(current_route(), phase).observe(time.perf_counter() - start)
+
+
+def count_rows(rows: int) -> None:
+    """Record rows returned by the current request."""
+    ROWS_RETURNED.labels(current_route()).inc(rows)
+
+
+class PoolCollector:
+    """Collector exporting connection pool statistics at scrape time."""
+
+    def __init__(self, get_stats: Callable[[], Dict[str, Any]]):
+        self.get_stats = get_stats
+
+    def collect(self):
+        stats = self.get_stats()
+        for key, description in [
+            ("size", "Open database connections."),
+            ("in_use", "Database connections checked out by requests."),
+            ("idle", "Open database connections waiting in the pool."),
+            ("waiters", "Requests waiting for a database connection."),
+            ("max_size", "Maximum number of database connections."),
+        ]:
+            yield GaugeMetricFamily(f"cleandb_db_pool_{key}", description, value=stats[key])
+        yield CounterMetricFamily(
+            "cleandb_db_pool_acquire_timeouts",
+            "Connection acquisitions that timed out.",
+            value=stats["acquire_timeouts"],
+        )
+
+
+def register_pool_collector(get_stats: Callable[[], Dict[str, Any]]) -> None:
+    """Export connection pool statistics from the given stats function."""
+    REGISTRY.register(PoolCollector(get_stats))
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format, with its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and response size per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_scope.set(scope)
+        start = time.perf_counter()
+        status = 500
+        sent = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            # The router records the matched route in the scope
+            route = route_label(scope)
+            REQUEST_LATENCY.labels(route, scope["method"], str(status)).observe(time.perf_counter() - start)
+            BYTES_SENT.labels(route).inc(sent)
+            current_scope.reset(token)
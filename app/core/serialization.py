@@ -0,0 +1,98 @@
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import orjson
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a value to JSON bytes."""
+    return orjson.dumps(value, default=json_default)
+
+
+def _predicted_ec(record: Mapping[str, Any]) -> List[dict]:
+    return [
+        {
+            "ec_number": ec,
+            "score": conf
+        }
+        for ec, conf in zip(record["clean_ec_number_array"], record["clean_ec_confidence_array"])
+    ]
+
+
+# Value of each CLEANDataBase field from a search result row, in response order
+FIELD_GETTERS: Dict[str, Callable[[Mapping[str, Any]], Any]] = {
+    "predictions_uniprot_annot_id": itemgetter("predictions_uniprot_annot_id"),
+    "uniprot": itemgetter("uniprot_id"),
+    "curation_status": itemgetter("curation_status"),
+    "accession": itemgetter("accession"),
+    "protein": itemgetter("protein_name"),
+    "organism": itemgetter("organism"),
+    "ncbi_tax_id": itemgetter("ncbi_taxid"),
+    "amino_acids": itemgetter("amino_acids"),
+    "sequence": itemgetter("protein_sequence"),
+    "function": itemgetter("enzyme_function"),
+    "gene_name": itemgetter("gene_name"),
+    "predicted_ec": _predicted_ec,
+    "annot_ec_number_array": itemgetter("annot_ec_number_array"),
+}
+
+
+def record_to_data(record: Mapping[str, Any], fields: Optional[List[str]] = None) -> dict:
+    """Convert a search result row into the public CLEANDataBase field layout.
+
+    Only the given fields are included if fields is set; the row only needs the columns they use.
+    """
+    if fields is not None:
+        return {field: FIELD_GETTERS[field](record) for field in fields}
+
+    # Spelled out for all fields, since this is the hot path for full pages
+    return {
+        "predictions_uniprot_annot_id": record["predictions_uniprot_annot_id"],
+        "uniprot": record["uniprot_id"],
+        "curation_status": record["curation_status"],
+        "accession": record["accession"],
+        "protein": record["protein_name"],
+        "organism": record["organism"],
+        "ncbi_tax_id": record["ncbi_taxid"],
+        "amino_acids": record["amino_acids"],
+        "sequence": record["protein_sequence"],
+        "function": record["enzyme_function"],
+        "gene_name": record["gene_name"],
+        "predicted_ec": _predicted_ec(record),
+        "annot_ec_number_array": record["annot_ec_number_array"],
+    }
+
+
+def search_response_json(
+    data: List[dict],
+    total: Optional[int],
+    total_estimated: bool,
+    limit: Optional[int],
+    offset: Optional[int],
+    next: Optional[str] = None,
+    previous: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+) -> bytes:
+    """Serialize a search response, with rows from `record_to_data`, to JSON bytes.
+
+    Produces the same document as CLEANSearchResponse.model_dump_json() without building and
+    validating a model per row, since rows come straight from the database.
+    """
+    return dumps({
+        "total": total,
+        "total_estimated": total_estimated,
+        "limit": limit,
+        "offset": offset,
+        "auto_paginated": False,
+        "next": next,
+        "previous": previous,
+        "next_cursor": next_cursor,
+        "data": data,
+    })
@@ -0,0 +1,135 @@
+from typing import Any, AsyncGenerator, List
+
+import asyncpg
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from app.core.metrics import count_rows, observe_phase
+from app.db.database import Database
+from app.db.queries import iterate_filtered_data
+from app.models.clean_data import CLEANColumn
+from app.models.query_params import CLEANSearchQueryParams
+
+# Arrow type for each selectable column of the search query
+ARROW_TYPES = {
+    CLEANColumn.predictions_uniprot_annot_id: pa.int64(),
+    CLEANColumn.uniprot_id: pa.string(),
+    CLEANColumn.curation_status: pa.string(),
+    CLEANColumn.accession: pa.string(),
+    CLEANColumn.protein_name: pa.string(),
+    CLEANColumn.organism: pa.string(),
+    CLEANColumn.ncbi_taxid: pa.int64(),
+    CLEANColumn.amino_acids: pa.int64(),
+    CLEANColumn.protein_sequence: pa.string(),
+    CLEANColumn.enzyme_function: pa.string(),
+    CLEANColumn.gene_name: pa.string(),
+    CLEANColumn.clean_ec_number_array: pa.list_(pa.string()),
+    CLEANColumn.clean_ec_confidence_array: pa.list_(pa.float64()),
+    CLEANColumn.annot_ec_number_array: pa.list_(pa.string()),
+}
+
+
+def get_arrow_schema(columns: List[CLEANColumn]) -> pa.Schema:
+    """Get the Arrow schema for the given search columns."""
+    return pa.schema([(column.value, ARROW_TYPES[column]) for column in columns])
+
+
+def records_to_record_batch(records: List[asyncpg.Record], schema: pa.Schema) -> pa.RecordBatch:
+    """Build a record batch column by column from asyncpg records selected in schema order."""
+    arrays = [
+        pa.array([record[i] for record in records], type=field.type)
+        for i, field in enumerate(schema)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+async def iterate_record_batches(
+    db: Database,
+    params: CLEANSearchQueryParams,
+    columns: List[CLEANColumn],
+    paginate: bool = True,
+    batch_size: int = 1000,
+) -> AsyncGenerator[pa.RecordBatch, None]:
+    """Stream filtered data from the database as Arrow record batches of up to batch_size rows."""
+    schema = get_arrow_schema(columns)
+    records = []
+    async for record in iterate_filtered_data(db, params, columns, paginate=paginate, prefetch=batch_size):
+        records.append(record)
+        if len(records) == batch_size:
+            with observe_phase("row_conversion"):
+                batch = records_to_record_batch(records, schema)
+            count_rows(batch.num_rows)
+            yield batch
+            records = []
+
+    if records:
+        with observe_phase("row_conversion"):
+            batch = records_to_record_batch(records, schema)
+        count_rows(batch.num_rows)
+        yield batch
+
+
+class _ChunkSink:
+    """Write-only file object that hands out whatever was written since the last drain."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+async def stream_arrow_ipc(
+    batches: AsyncGenerator[pa.RecordBatch, None], schema: pa.Schema
+) -> AsyncGenerator[bytes, None]:
+    """Encode record batches as an Arrow IPC stream, yielding bytes as each batch is written."""
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    async for batch in batches:
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+async def stream_parquet(
+    batches: AsyncGenerator[pa.RecordBatch, None], schema: pa.Schema, row_group_size: int
+) -> AsyncGenerator[bytes, None]:
+    """Encode record batches as a Parquet file, yielding bytes as each row group is written."""
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    pending = []
+    pending_rows = 0
+    async for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows >= row_group_size:
+            writer.write_table(pa.Table.from_batches(pending, schema=schema))
+            pending = []
+            pending_rows = 0
+            yield sink.drain()
+
+    if pending:
+        writer.write_table(pa.Table.from_batches(pending, schema=schema))
+    writer.close()
+    yield sink.drain()
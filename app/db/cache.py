@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import asyncpg
+import orjson
+from loguru import logger
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.core.serialization import json_default
+from app.db.database import Database
+
+# Changes whenever one of the given relations is rewritten (REFRESH MATERIALIZED VIEW, TRUNCATE)
+# or has rows inserted, updated or deleted (REFRESH MATERIALIZED VIEW CONCURRENTLY, plain DML)
+DATA_VERSION_QUERY = """
+    SELECT string_agg(
+        c.relname || ':' || c.relfilenode || ':' || COALESCE(s.n_tup_ins + s.n_tup_upd + s.n_tup_del, 0),
+        ',' ORDER BY c.relname
+    )
+    FROM pg_class c
+    LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid
+    WHERE c.relnamespace = 'cleandb'::regnamespace AND c.relname = ANY($1::text[])
+"""
+
+
+def _cache_json_default(value: Any) -> Any:
+    # Rows are cached as plain dicts, which read the same as records
+    if isinstance(value, asyncpg.Record):
+        return dict(value)
+    return json_default(value)
+
+
+def serialize(value: Any) -> bytes:
+    """Serialize a query result to JSON bytes for caching.
+
+    Tuples come back as lists, records as dicts and decimals as floats.
+    """
+    return orjson.dumps(value, default=_cache_json_default)
+
+
+class CacheBackend(ABC):
+    """Storage for cached query results, serialized to bytes."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a value, or None if the key is absent or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store a value for ttl seconds."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop every cached value."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process cache with a TTL per entry and LRU eviction above max_entries or max_bytes.
+
+    Values larger than max_bytes are not stored.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.size -= len(value)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size += len(value)
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared between replicas, stored in Redis.
+
+    Requires the optional `redis` package. Eviction is left to the Redis maxmemory policy.
+    """
+
+    def __init__(self, url: str, prefix: str = "cleandb"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("CACHE_REDIS_URL is set but the redis package is not installed") from e
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(f"{self.prefix}:{key}")
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(f"{self.prefix}:{key}", value, ex=max(1, int(ttl)))
+
+    async def clear(self) -> None:
+        # Keys embed the data version, so entries from an old version are never read again
+        # and simply expire
+        pass
+
+
+def normalize_params(params: BaseModel, exclude: set[str] | None = None) -> str:
+    """Serialize query parameters into a canonical string.
+
+    Multi-valued filters are OR'ed, so their values are sorted and deduplicated.
+    """
+    data = params.model_dump(mode="json", exclude=exclude)
+    for key, value in data.items():
+        if isinstance(value, list):
+            data[key] = sorted(set(value))
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+class ResultCache:
+    """Cache of query results keyed by normalized query parameters.
+
+    Keys include the current data version, which is polled from the database, so cached
+    results are invalidated as soon as the underlying tables or materialized views change.
+    Results are stored as JSON (see `serialize`), so a hit returns lists and dicts.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.data_version = ""
+        self.hits = 0
+        self.misses = 0
+        self._version_listeners: list[Callable[[str], Awaitable[None]]] = []
+
+    def make_key(self, namespace: str, params: BaseModel, exclude: set[str] | None = None) -> str:
+        digest = hashlib.sha256(normalize_params(params, exclude).encode()).hexdigest()
+        return f"{self.data_version}:{namespace}:{digest}"
+
+    async def get_or_set(
+        self,
+        namespace: str,
+        params: BaseModel,
+        fetch: Callable[[], Awaitable[Any]],
+        exclude: set[str] | None = None,
+        cacheable: bool = True,
+    ) -> Any:
+        """Return the cached result for params, calling fetch and caching its result on a miss."""
+        if not self.enabled or not cacheable:
+            return await fetch()
+
+        key = self.make_key(namespace, params, exclude)
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            CACHE_REQUESTS.labels(namespace, "hit").inc()
+            return orjson.loads(cached)
+
+        self.misses += 1
+        CACHE_REQUESTS.labels(namespace, "miss").inc()
+        value = await fetch()
+        await self.backend.set(key, serialize(value), self.ttl)
+        return value
+
+    def add_version_listener(self, listener: Callable[[str], Awaitable[None]]) -> None:
+        """Register a coroutine function called with the new data version whenever it changes."""
+        self._version_listeners.append(listener)
+
+    async def refresh_data_version(self, db: Database) -> bool:
+        """Poll the data version from the database, clearing the cache if it changed."""
+        version = await db.fetchval(DATA_VERSION_QUERY, settings.CACHE_VERSION_TABLES) or ""
+        version = hashlib.sha256(version.encode()).hexdigest()[:16]
+        if version == self.data_version:
+            return False
+
+        if self.data_version:
+            logger.info(f"Data version changed from {self.data_version} to {version}, clearing result cache")
+        self.data_version = version
+        await self.backend.clear()
+        for listener in self._version_listeners:
+            try:
+                await listener(version)
+            except Exception as e:
+                logger.error(f"Error in data version listener: {e}")
+        return True
+
+    async def watch_data_version(self, db: Database, interval: float) -> None:
+        """Poll the data version every interval seconds until cancelled."""
+        while True:
+            try:
+                await self.refresh_data_version(db)
+            except Exception as e:
+                logger.error(f"Failed to poll data version: {e}")
+            await asyncio.sleep(interval)
+
+
+def _create_backend() -> CacheBackend:
+    if settings.CACHE_REDIS_URL:
+        return RedisCacheBackend(settings.CACHE_REDIS_URL)
+    return MemoryCacheBackend(settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES)
+
+
+result_cache = ResultCache(
+    _create_backend(),
+    ttl=settings.CACHE_TTL_SECONDS,
+    enabled=settings.CACHE_ENABLED,
+)
@@ -1,9 +1,19 @@
-from typing import Any, AsyncGenerator, Dict, List, Optional
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Set
 
 import asyncpg
 from loguru import logger
 
 from app.core.config import settings
+from app.core.logging import log_query
+from app.core.metrics import COALESCED_QUERIES, POOL_ACQUIRE_LATENCY, STATEMENT_CACHE_REQUESTS
+from app.db.slow_queries import SlowQueryLog
+
+# Statements longer than this are not kept in the statement cache of connections
+MAX_CACHEABLE_STATEMENT_SIZE = 15 * 1024
 
 
 async def get_connection() -> asyncpg.Connection:
@@ -14,23 +24,31 @@ async def get_connection() -> asyncpg.Connection:
         host=settings.CLEAN_DB_HOST,
         port=settings.CLEAN_DB_PORT,
         database=settings.CLEAN_DB_NAME,
+        statement_cache_size=settings.CLEAN_DB_STATEMENT_CACHE_SIZE,
+        max_cacheable_statement_size=MAX_CACHEABLE_STATEMENT_SIZE,
+        command_timeout=settings.CLEAN_DB_COMMAND_TIMEOUT,
     )
     return conn
 
 
 async def get_connection_pool() -> asyncpg.Pool:
     """Get a database connection pool."""
-    print(settings.CLEAN_DB_USER)
-    print(settings.CLEAN_DB_PORT)
-    print(settings.CLEAN_DB_NAME)
-    print(settings.CLEAN_DB_PASSWORD)
-    print(settings.CLEAN_DB_HOST)
+    logger.info(
+        f"Connecting to {settings.CLEAN_DB_HOST}:{settings.CLEAN_DB_PORT}/{settings.CLEAN_DB_NAME} "
+        f"as {settings.CLEAN_DB_USER} (pool size {settings.CLEAN_DB_POOL_MIN_SIZE}-{settings.CLEAN_DB_POOL_MAX_SIZE})"
+    )
     pool = await asyncpg.create_pool(
         user=settings.CLEAN_DB_USER,
         password=settings.CLEAN_DB_PASSWORD,
         host=settings.CLEAN_DB_HOST,
         port=settings.CLEAN_DB_PORT,
         database=settings.CLEAN_DB_NAME,
+        min_size=settings.CLEAN_DB_POOL_MIN_SIZE,
+        max_size=settings.CLEAN_DB_POOL_MAX_SIZE,
+        max_inactive_connection_lifetime=settings.CLEAN_DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME,
+        statement_cache_size=settings.CLEAN_DB_STATEMENT_CACHE_SIZE,
+        max_cacheable_statement_size=MAX_CACHEABLE_STATEMENT_SIZE,
+        command_timeout=settings.CLEAN_DB_COMMAND_TIMEOUT,
     )
     return pool
 
@@ -40,6 +58,28 @@ class Database:
 
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
+        # Connection acquisition statistics
+        self.waiters = 0
+        self.acquire_count = 0
+        self.acquire_timeouts = 0
+        self.acquire_seconds_total = 0.0
+        self.acquire_seconds_max = 0.0
+        self._recent_acquire_seconds: deque[float] = deque(maxlen=1000)
+        # Most recently used statements of each connection, by server process ID, mirroring the
+        # LRU statement cache that asyncpg keeps per connection
+        self._recent_statements: OrderedDict[int, OrderedDict[str, None]] = OrderedDict()
+        # Queries being run, by kind, SQL and arguments, shared by identical concurrent queries
+        self._in_flight: Dict[tuple, asyncio.Task] = {}
+        # Installed extensions and populated materialized views of cleandb, which optional query
+        # paths depend on (see load_catalog)
+        self.extensions: Set[str] = set()
+        self.populated_views: Set[str] = set()
+        self.slow_queries = SlowQueryLog(
+            threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+            max_entries=settings.SLOW_QUERY_LOG_SIZE,
+            explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+            redact=settings.SLOW_QUERY_REDACT_PARAMS,
+        )
 
     async def connect(self) -> None:
         """Initialize the database connection pool."""
@@ -47,10 +87,28 @@ class Database:
             try:
                 self.pool = await get_connection_pool()
                 logger.info("Database connection pool established")
+                await self.load_catalog()
+                if "pg_trgm" not in self.extensions:
+                    logger.warning("pg_trgm is not installed: substring typeahead cannot use trigram indexes")
             except Exception as e:
                 logger.error(f"Failed to connect to database: {e}")
                 raise
 
+    async def load_catalog(self) -> None:
+        """Read the installed extensions and the populated materialized views of cleandb.
+
+        Queries only use views created by later migrations (e.g. the typeahead rollup view) once
+        they are populated, so a database that was not migrated keeps working. Called when the
+        pool is created and whenever the data version changes.
+        """
+        async with self.pool.acquire() as conn:
+            extensions = await conn.fetch("SELECT extname FROM pg_extension")
+            views = await conn.fetch(
+                "SELECT matviewname FROM pg_matviews WHERE schemaname = 'cleandb' AND ispopulated"
+            )
+        self.extensions = {record["extname"] for record in extensions}
+        self.populated_views = {record["matviewname"] for record in views}
+
     async def disconnect(self) -> None:
         """Close the database connection pool."""
         if self.pool:
@@ -58,24 +116,171 @@ class Database:
             self.pool = None
             logger.info("Database connection pool closed")
 
-    async def execute(self, query: str, *args, **kwargs) -> str:
-        """Execute a query."""
+    @asynccontextmanager
+    async def acquire(self) -> AsyncGenerator[asyncpg.Connection, None]:
+        """Acquire a connection from the pool, recording how long the wait took."""
         if not self.pool:
             await self.connect()
-        return await self.pool.execute(query, *args, **kwargs)
+
+        start = time.perf_counter()
+        self.waiters += 1
+        try:
+            conn = await self.pool.acquire(timeout=settings.CLEAN_DB_POOL_ACQUIRE_TIMEOUT)
+        except TimeoutError:
+            self.acquire_timeouts += 1
+            raise
+        finally:
+            self.waiters -= 1
+        self._record_acquire(time.perf_counter() - start)
+
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    def _record_acquire(self, seconds: float) -> None:
+        self.acquire_count += 1
+        self.acquire_seconds_total += seconds
+        self.acquire_seconds_max = max(self.acquire_seconds_max, seconds)
+        self._recent_acquire_seconds.append(seconds)
+        POOL_ACQUIRE_LATENCY.observe(seconds)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool usage and acquisition latency statistics."""
+        size = self.pool.get_size() if self.pool else 0
+        idle = self.pool.get_idle_size() if self.pool else 0
+        recent = sorted(self._recent_acquire_seconds)
+        return {
+            "min_size": settings.CLEAN_DB_POOL_MIN_SIZE,
+            "max_size": settings.CLEAN_DB_POOL_MAX_SIZE,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiters": self.waiters,
+            "acquire_count": self.acquire_count,
+            "acquire_timeouts": self.acquire_timeouts,
+            "acquire_seconds_total": self.acquire_seconds_total,
+            "acquire_seconds_max": self.acquire_seconds_max,
+            "acquire_seconds_p50": recent[len(recent) // 2] if recent else None,
+            "acquire_seconds_p95": recent[int(len(recent) * 0.95)] if recent else None,
+        }
+
+    def _record_statement(self, conn: asyncpg.Connection, query: str) -> None:
+        """Count whether the query reuses one of the most recent statements of the connection.
+
+        asyncpg keeps an LRU cache of the CLEAN_DB_STATEMENT_CACHE_SIZE most recent prepared
+        statements on each connection, except statements longer than MAX_CACHEABLE_STATEMENT_SIZE,
+        so this mirrors its hit rate: a miss means the statement has to be parsed and planned again.
+        """
+        # Pooled connections are told apart by their server process. Connections the pool has
+        # closed are no longer used, so they are the first dropped.
+        pid = conn.get_server_pid()
+        statements = self._recent_statements.pop(pid, None)
+        if statements is None:
+            statements = OrderedDict()
+        self._recent_statements[pid] = statements
+        while len(self._recent_statements) > settings.CLEAN_DB_POOL_MAX_SIZE:
+            self._recent_statements.popitem(last=False)
+
+        if query in statements:
+            statements.move_to_end(query)
+            STATEMENT_CACHE_REQUESTS.labels("hit").inc()
+            return
+
+        STATEMENT_CACHE_REQUESTS.labels("miss").inc()
+        if len(query) > MAX_CACHEABLE_STATEMENT_SIZE:
+            return
+        statements[query] = None
+        while len(statements) > settings.CLEAN_DB_STATEMENT_CACHE_SIZE:
+            statements.popitem(last=False)
+
+    @asynccontextmanager
+    async def _timed(
+        self, conn: asyncpg.Connection, query: str, args: tuple, prepared: bool = True
+    ) -> AsyncGenerator[None, None]:
+        """Time the query run on conn in the body of the with block, logging a sample and slow queries."""
+        if prepared:
+            self._record_statement(conn, query)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            log_query(query, len(args), duration_ms)
+            self.slow_queries.record(self, query, args, duration_ms)
+
+    async def _single_flight(self, key: tuple, run: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a read query, or wait for the identical query already running and share its result.
+
+        The query runs in its own task, shielded from the cancellation of any one caller (e.g. on
+        client disconnect), so the other callers still get the result. Callers must not modify
+        shared results, as is already the case for results from the result cache.
+        """
+        if not settings.CLEAN_DB_SINGLE_FLIGHT:
+            return await run()
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(run())
+            self._in_flight[key] = task
+
+            def done(task: asyncio.Task) -> None:
+                if self._in_flight.get(key) is task:
+                    del self._in_flight[key]
+                # Mark the exception as retrieved in case every caller was cancelled
+                if not task.cancelled():
+                    task.exception()
+
+            task.add_done_callback(done)
+        else:
+            COALESCED_QUERIES.inc()
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _flight_key(kind: str, query: str, args: tuple, kwargs: dict) -> tuple:
+        # Arguments may be unhashable (arrays), and their repr also tells apart 1 and "1"
+        return kind, query, repr(args), repr(sorted(kwargs.items()))
+
+    async def execute(self, query: str, *args, **kwargs) -> str:
+        """Execute a query."""
+        async with self.acquire() as conn:
+            # Without arguments, asyncpg runs the query with the simple query protocol, unprepared
+            async with self._timed(conn, query, args, prepared=bool(args)):
+                return await conn.execute(query, *args, **kwargs)
 
     async def fetch(self, query: str, *args, **kwargs) -> List[Dict[str, Any]]:
-        """Fetch rows from a query."""
-        if not self.pool:
-            await self.connect()
-        records = await self.pool.fetch(query, *args, **kwargs)
-        return [dict(record) for record in records]
+        """Fetch rows from a query, sharing one run between identical concurrent queries."""
+        async def run() -> List[Dict[str, Any]]:
+            async with self.acquire() as conn:
+                async with self._timed(conn, query, args):
+                    records = await conn.fetch(query, *args, **kwargs)
+            return [dict(record) for record in records]
+
+        return await self._single_flight(self._flight_key("fetch", query, args, kwargs), run)
 
     async def fetchval(self, query: str, *args, **kwargs) -> Any:
-        """Fetch a single value from a query."""
-        if not self.pool:
-            await self.connect()
-        return await self.pool.fetchval(query, *args, **kwargs)
+        """Fetch a single value from a query, sharing one run between identical concurrent queries."""
+        async def run() -> Any:
+            async with self.acquire() as conn:
+                async with self._timed(conn, query, args):
+                    return await conn.fetchval(query, *args, **kwargs)
+
+        return await self._single_flight(self._flight_key("fetchval", query, args, kwargs), run)
+
+    async def iterate(
+        self, query: str, *args, prefetch: int = 1000
+    ) -> AsyncGenerator[asyncpg.Record, None]:
+        """Iterate over the rows of a query through a server-side cursor.
+
+        Rows are fetched from the server `prefetch` at a time, so memory use does not depend
+        on the size of the result set. The connection is held until iteration finishes.
+        """
+        async with self.acquire() as conn:
+            self._record_statement(conn, query)
+            # Server-side cursors only exist inside a transaction
+            async with conn.transaction(readonly=True):
+                async for record in conn.cursor(query, *args, prefetch=prefetch):
+                    yield record
 
 
 # Dependency for database access
@@ -0,0 +1,125 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.db.database import Database
+
+EC_CLASS_NAMES_QUERY = "SELECT ec_number, ec_name FROM cleandb.ec_class_names"
+
+# Length of the substrings of names indexed for lookup by name
+NGRAM_SIZE = 3
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def _ec_sort_key(ec_number: str) -> Tuple:
+    """Sort EC numbers numerically by level, with classes ("1.1.-.-") before their members."""
+    return tuple(
+        (-1, 0, "") if part == "-" else (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in ec_number.split(".")
+    )
+
+
+def _name_match_rank(name: str, search: str) -> Optional[int]:
+    """Rank how well a lowercase name matches a lowercase search term, lower is better, or None."""
+    if name == search:
+        return 2
+    if name.startswith(search):
+        return 3
+    position = name.find(search)
+    if position < 0:
+        return None
+    # Matches at the start of a word rank above matches inside a word
+    while position >= 0:
+        if not name[position - 1].isalnum():
+            return 4
+        position = name.find(search, position + 1)
+    return 5
+
+
+class ECIndex:
+    """In-memory index of cleandb.ec_class_names for EC lookups.
+
+    EC numbers are kept sorted to find prefix matches by binary search, and names are indexed by
+    their character trigrams to find substring matches without scanning every name.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._numbers: List[str] = []
+        self._names: Dict[str, Optional[str]] = {}
+        self._lower_names: Dict[str, str] = {}
+        self._ngrams: Dict[str, Set[str]] = {}
+
+    async def load(self, db: Database) -> None:
+        """Load the EC class names from the database, replacing the index atomically."""
+        records = await db.fetch(EC_CLASS_NAMES_QUERY)
+
+        names = {record["ec_number"]: record["ec_name"] for record in records}
+        lower_names = {ec_number: name.lower() for ec_number, name in names.items() if name}
+        ngrams = defaultdict(set)
+        for ec_number, name in lower_names.items():
+            for ngram in _ngrams(name):
+                ngrams[ngram].add(ec_number)
+
+        self._numbers, self._names, self._lower_names, self._ngrams = (
+            sorted(names), names, lower_names, dict(ngrams)
+        )
+        self.loaded = True
+        logger.info(f"Loaded {len(names)} EC class names into the EC index")
+
+    async def refresh(self, db: Database) -> None:
+        """Reload the index, keeping the previous one if loading fails."""
+        try:
+            await self.load(db)
+        except Exception as e:
+            logger.error(f"Failed to load the EC index: {e}")
+
+    def _number_matches(self, search: str) -> List[str]:
+        matches = []
+        for i in range(bisect_left(self._numbers, search), len(self._numbers)):
+            if not self._numbers[i].startswith(search):
+                break
+            matches.append(self._numbers[i])
+        return matches
+
+    def _name_candidates(self, search: str) -> Set[str]:
+        if len(search) < NGRAM_SIZE:
+            return set(self._lower_names)
+        # Names containing the term contain all of its trigrams; the rarest narrows down most
+        postings = sorted((self._ngrams.get(ngram, set()) for ngram in _ngrams(search)), key=len)
+        return set.intersection(*postings)
+
+    def search(self, search: str, limit: int) -> List[Dict[str, Optional[str]]]:
+        """Look up EC numbers starting with, or EC names containing, the search term.
+
+        Matches are ranked by quality: exact EC number, EC number prefix (broader classes first),
+        then names equal to, starting with, with a word starting with, or containing the term.
+        """
+        search = search.strip()
+        lower_search = search.lower()
+        ranked = {}
+        for ec_number in self._number_matches(search):
+            ranked[ec_number] = 0 if ec_number == search else 1
+        for ec_number in self._name_candidates(lower_search):
+            rank = _name_match_rank(self._lower_names[ec_number], lower_search)
+            if rank is not None and ec_number not in ranked:
+                ranked[ec_number] = rank
+
+        matches = sorted(
+            ranked,
+            key=lambda ec_number: (
+                ranked[ec_number],
+                # Broader classes first for number matches, shorter names first for name matches
+                -ec_number.count("-") if ranked[ec_number] <= 1 else len(self._lower_names[ec_number]),
+                _ec_sort_key(ec_number),
+            ),
+        )
+        return [{"ec_number": ec_number, "ec_name": self._names[ec_number]} for ec_number in matches[:limit]]
+
+
+ec_index = ECIndex()
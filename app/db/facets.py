@@ -0,0 +1,263 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.metrics import observe_phase
+from app.db.cache import result_cache
+from app.db.database import Database
+from app.db.filters import CompiledFilter, compile_params
+from app.db.queries import get_query
+from app.models.query_params import CLEANFacetQueryParams, FacetName
+
+# Number of matching records per predicted EC class at each level of the hierarchy, top `limit`
+# per level. Records count once per class even if several of their predictions fall in it.
+# Class names use the dash convention of ec_class_names (e.g. "1.1.-.-").
+EC_FACET_QUERY = """
+    WITH predictions AS (
+        {predictions}
+    ),
+    grouped AS (
+        SELECT
+            CASE
+                WHEN GROUPING(level_1) = 0 THEN 1
+                WHEN GROUPING(level_2) = 0 THEN 2
+                WHEN GROUPING(level_3) = 0 THEN 3
+                ELSE 4
+            END AS level,
+            COALESCE(level_1, level_2, level_3, ec_number) AS value,
+            COUNT(DISTINCT id) AS count
+        FROM (
+            SELECT
+                id,
+                ec_number,
+                split_part(ec_number, '.', 1) AS level_1,
+                split_part(ec_number, '.', 1) || '.' || split_part(ec_number, '.', 2) AS level_2,
+                split_part(ec_number, '.', 1) || '.' || split_part(ec_number, '.', 2) || '.' || split_part(ec_number, '.', 3) AS level_3
+            FROM predictions
+        ) levels
+        GROUP BY GROUPING SETS ((level_1), (level_2), (level_3), (ec_number))
+    ),
+    ranked AS (
+        SELECT level, value, count, ROW_NUMBER() OVER (PARTITION BY level ORDER BY count DESC, value) AS rank
+        FROM grouped
+    )
+    SELECT ranked.level, ranked.value, ranked.count, names.ec_name AS name
+    FROM ranked
+    LEFT JOIN cleandb.ec_class_names names
+        ON names.ec_number = ranked.value || repeat('.-', 4 - ranked.level)
+    WHERE ranked.rank <= ${limit_idx}
+    ORDER BY ranked.level, ranked.count DESC, ranked.value
+"""
+
+# Sequence length histogram over the range of the matching records, in a single scan
+SEQUENCE_LENGTH_FACET_QUERY = """
+    WITH lengths AS MATERIALIZED (
+        {lengths}
+    ),
+    bounds AS (
+        SELECT MIN(length) AS lower, MAX(length) + 1 AS upper FROM lengths
+    )
+    SELECT
+        bounds.lower,
+        bounds.upper,
+        LEAST(width_bucket(lengths.length::float8, bounds.lower::float8, bounds.upper::float8, ${bins_idx}), ${bins_idx}) AS bucket,
+        COUNT(*) AS count
+    FROM lengths, bounds
+    WHERE lengths.length IS NOT NULL
+    GROUP BY 1, 2, 3
+    ORDER BY 3
+"""
+
+
+async def _ec_facet(db: Database, context: CompiledFilter, args: List[Any], limit: int) -> Dict[str, list]:
+    predictions = get_query(
+        "pua.predictions_uniprot_annot_id AS id, unnest(puace.clean_ec_number_array) AS ec_number",
+        context.where_clause,
+        include_order_by=False,
+        include_annot_ec=False,
+    )
+    query = EC_FACET_QUERY.format(predictions=predictions, limit_idx=len(args) + 1)
+    records = await db.fetch(query, *args, limit)
+
+    levels = {f"level_{level}": [] for level in range(1, 5)}
+    for record in records:
+        levels[f"level_{record['level']}"].append(
+            {"value": record["value"], "count": record["count"], "name": record["name"]}
+        )
+    return levels
+
+
+async def _organism_facet(db: Database, context: CompiledFilter, args: List[Any], limit: int) -> Dict[str, Any]:
+    query = get_query(
+        "pua.organism AS value, COUNT(*) AS count, COUNT(pua.organism) OVER () AS distinct_count",
+        context.where_clause,
+        include_order_by=False,
+        include_annot_ec=False,
+    )
+    query += f"""
+    GROUP BY pua.organism
+    ORDER BY count DESC, value
+    LIMIT ${len(args) + 1}"""
+    records = await db.fetch(query, *args, limit)
+    return {
+        "organism": [{"value": record["value"], "count": record["count"]} for record in records],
+        # Counted over all groups before the limit, except the group of records without an organism
+        "organism_distinct": records[0]["distinct_count"] if records else 0,
+    }
+
+
+async def _curation_status_facet(db: Database, context: CompiledFilter, args: List[Any]) -> List[dict]:
+    query = get_query(
+        "pua.curation_status AS value, COUNT(*) AS count",
+        context.where_clause,
+        include_order_by=False,
+        include_annot_ec=False,
+    )
+    query += """
+    GROUP BY pua.curation_status
+    ORDER BY count DESC, value"""
+    records = await db.fetch(query, *args)
+    return [{"value": record["value"], "count": record["count"]} for record in records]
+
+
+def _histogram(lower: float, upper: float, bins: int, counts: Dict[int, int]) -> List[dict]:
+    """Build histogram bins from counts per 1-based bucket number of width_bucket."""
+    width = (upper - lower) / bins
+    return [
+        {"lower": lower + width * i, "upper": lower + width * (i + 1), "count": counts.get(i + 1, 0)}
+        for i in range(bins)
+    ]
+
+
+async def _sequence_length_facet(db: Database, context: CompiledFilter, args: List[Any], bins: int) -> List[dict]:
+    lengths = get_query(
+        "pua.amino_acids AS length",
+        context.where_clause,
+        include_order_by=False,
+        include_annot_ec=False,
+    )
+    query = SEQUENCE_LENGTH_FACET_QUERY.format(lengths=lengths, bins_idx=len(args) + 1)
+    records = await db.fetch(query, *args, bins)
+    if not records:
+        return []
+    counts = {record["bucket"]: record["count"] for record in records}
+    return _histogram(records[0]["lower"], records[0]["upper"], bins, counts)
+
+
+async def _confidence_facet(db: Database, context: CompiledFilter, args: List[Any], bins: int) -> List[dict]:
+    bins_idx = len(args) + 1
+    query = get_query(
+        f"GREATEST(LEAST(width_bucket(puace.max_clean_ec_confidence::float8, 0, 1, ${bins_idx}), ${bins_idx}), 1) AS bucket, COUNT(*) AS count",
+        f"{context.where_clause} AND puace.max_clean_ec_confidence IS NOT NULL",
+        include_order_by=False,
+        include_annot_ec=False,
+    )
+    query += """
+    GROUP BY 1"""
+    records = await db.fetch(query, *args, bins)
+    return _histogram(0.0, 1.0, bins, {record["bucket"]: record["count"] for record in records})
+
+
+async def compute_facets(db: Database, params: CLEANFacetQueryParams) -> Dict[str, Any]:
+    """Compute the requested facets of the records matching the filters.
+
+    Each facet is a single aggregate query, and the facets are computed concurrently.
+    """
+    with observe_phase("sql_build"):
+        context, args = compile_params(params)
+
+    tasks = {}
+    if FacetName.PREDICTED_EC in params.facets:
+        tasks["predicted_ec"] = _ec_facet(db, context, args, params.limit)
+    if FacetName.ORGANISM in params.facets:
+        tasks["organism"] = _organism_facet(db, context, args, params.limit)
+    if FacetName.CURATION_STATUS in params.facets:
+        tasks["curation_status"] = _curation_status_facet(db, context, args)
+    if FacetName.SEQUENCE_LENGTH in params.facets:
+        tasks["sequence_length"] = _sequence_length_facet(db, context, args, params.bins)
+    if FacetName.CLEAN_EC_CONFIDENCE in params.facets:
+        tasks["clean_ec_confidence"] = _confidence_facet(db, context, args, params.bins)
+
+    with observe_phase("data_query"):
+        results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+
+    # The organism facet also returns the number of distinct organisms
+    if "organism" in results:
+        results.update(results["organism"])
+    if "curation_status" in results:
+        # Every matching record has exactly one (possibly null) curation status
+        results["total"] = sum(value["count"] for value in results["curation_status"])
+    return results
+
+
+# Facets of all records with the default options, recomputed whenever the data changes, and
+# the data version they were computed for
+_unfiltered_facets: Optional[Dict[str, Any]] = None
+_unfiltered_facets_version: Optional[str] = None
+_precompute_task: Optional[asyncio.Task] = None
+
+
+async def precompute_unfiltered_facets(db: Database) -> None:
+    """Compute the facets of all records with the default options, for get_facets to serve.
+
+    The previous facets are served until the new ones are ready. They are dropped if the
+    precompute fails after the data changed.
+    """
+    global _unfiltered_facets, _unfiltered_facets_version
+    version = result_cache.data_version
+    try:
+        facets = await compute_facets(db, CLEANFacetQueryParams())
+    except Exception as e:
+        logger.error(f"Failed to precompute facets: {e}")
+        if _unfiltered_facets_version != version:
+            _unfiltered_facets = None
+        return
+    _unfiltered_facets, _unfiltered_facets_version = facets, version
+    logger.info(f"Precomputed facets of all records for data version {version}")
+
+
+async def refresh_unfiltered_facets(db: Database) -> None:
+    """Start precomputing the facets in the background, replacing any precompute in progress.
+
+    Returns without waiting for the precompute, so it can be used as a data version listener.
+    """
+    global _precompute_task
+    stop_precomputing_facets()
+    _precompute_task = asyncio.create_task(precompute_unfiltered_facets(db))
+
+
+def stop_precomputing_facets() -> None:
+    """Cancel any precompute in progress."""
+    if _precompute_task and not _precompute_task.done():
+        _precompute_task.cancel()
+
+
+def _get_unfiltered_facets(params: CLEANFacetQueryParams) -> Optional[Dict[str, Any]]:
+    """Get the precomputed facets if they answer params, i.e. no filters and default options."""
+    defaults = CLEANFacetQueryParams()
+    if (
+        _unfiltered_facets is None
+        or params.limit != defaults.limit
+        or params.bins != defaults.bins
+        or compile_params(params)[0].shape
+    ):
+        return None
+
+    facets = {key: _unfiltered_facets[key] for key in params.facets}
+    if FacetName.ORGANISM in params.facets:
+        facets["organism_distinct"] = _unfiltered_facets["organism_distinct"]
+    if FacetName.CURATION_STATUS in params.facets:
+        facets["total"] = _unfiltered_facets["total"]
+    return {**facets, "precomputed": True}
+
+
+async def get_facets(db: Database, params: CLEANFacetQueryParams) -> Dict[str, Any]:
+    """Get facet counts for the records matching the filters.
+
+    Facets of all records with the default options are precomputed, others are cached.
+    """
+    facets = _get_unfiltered_facets(params)
+    if facets is not None:
+        return facets
+    return await result_cache.get_or_set("facets", params, lambda: compute_facets(db, params))
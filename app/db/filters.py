@@ -0,0 +1,148 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, List, Tuple
+
+from app.models.query_params import CLEANFacetQueryParams, CLEANSearchQueryParams, CLEANTypeaheadQueryParams
+
+# These models share the filter fields compiled here
+FilterParams = CLEANSearchQueryParams | CLEANTypeaheadQueryParams | CLEANFacetQueryParams
+
+# Names of the filters present and how many arguments each one binds. This is all the SQL
+# of a compiled filter depends on, so it is the key under which compiled filters are memoized.
+FilterShape = Tuple[Tuple[str, int], ...]
+
+
+def split_ec_numbers(values: List[str]) -> Tuple[List[str], List[str]]:
+    """Split EC number filters into exact values and LIKE patterns.
+
+    Dashes are wildcards matching the end of the EC number (e.g., "1.2.-.-"), which is the
+    convention used in the ec_class_names table.
+    """
+    exact = []
+    patterns = []
+    for value in values:
+        if value.endswith("-"):
+            patterns.append(re.sub(r'-.*$', '%', value))
+        else:
+            exact.append(value)
+    return exact, patterns
+
+
+def _ec_number_args(params: FilterParams) -> List[Any]:
+    if not params.clean_ec_number:
+        return []
+    exact, patterns = split_ec_numbers(params.clean_ec_number)
+    # Patterns are bound one by one, since only a scalar LIKE can use an index
+    return [exact] + patterns
+
+
+def _ec_number_sql(placeholders: List[str]) -> str:
+    exact, *patterns = placeholders
+    column_conditions = [f"clean_ec_number = ANY({exact}::text[])"]
+    column_conditions += [f"clean_ec_number LIKE {pattern}" for pattern in patterns]
+    return (
+        "pua.predictions_uniprot_annot_id IN (SELECT predictions_uniprot_annot_id "
+        "FROM cleandb.predictions_uniprot_annot_clean_ec WHERE " + " OR ".join(column_conditions) + ")"
+    )
+
+
+@dataclass(frozen=True)
+class _Filter:
+    name: str
+    # Arguments to bind, or an empty list if the filter is not set
+    args: Callable[[FilterParams], List[Any]]
+    # SQL condition, given the placeholders of the arguments
+    sql: Callable[[List[str]], str]
+
+
+def _string_filter(column: str) -> _Filter:
+    """Case-insensitive exact match on any of the values, bound as a single array."""
+    return _Filter(
+        column,
+        lambda params: [[value.lower() for value in values]] if (values := getattr(params, column)) else [],
+        lambda placeholders: f"LOWER(pua.{column}) = ANY({placeholders[0]}::text[])",
+    )
+
+
+# Filters in the order their conditions and arguments appear. Conditions reference the
+# predictions_uniprot_annot table as pua and, for confidence filters, the
+# predictions_uniprot_annot_clean_ec_mv01 view as puace.
+FILTERS: Tuple[_Filter, ...] = (
+    _Filter(
+        "accession",
+        # accessions are stored and indexed in uppercase
+        lambda params: [[value.upper() for value in params.accession]] if params.accession else [],
+        lambda placeholders: f"pua.accession = ANY({placeholders[0]}::text[])",
+    ),
+    _string_filter("protein_name"),
+    _string_filter("organism"),
+    _string_filter("gene_name"),
+    _string_filter("uniprot_id"),
+    _Filter("clean_ec_number", _ec_number_args, _ec_number_sql),
+    _Filter(
+        "clean_ec_confidence_min",
+        lambda params: [params.clean_ec_confidence_min] if params.clean_ec_confidence_min is not None else [],
+        lambda placeholders: f"puace.max_clean_ec_confidence > {placeholders[0]}",
+    ),
+    _Filter(
+        "clean_ec_confidence_max",
+        lambda params: [params.clean_ec_confidence_max] if params.clean_ec_confidence_max is not None else [],
+        lambda placeholders: f"puace.max_clean_ec_confidence < {placeholders[0]}",
+    ),
+    _Filter(
+        "sequence_length",
+        lambda params: [int(params.sequence_length)] if params.sequence_length is not None else [],
+        lambda placeholders: f"pua.amino_acids >= {placeholders[0]}",
+    ),
+    _string_filter("curation_status"),
+)
+
+_FILTERS_BY_NAME = {f.name: f for f in FILTERS}
+
+# Filters whose conditions reference the puace alias
+CONFIDENCE_FILTERS = {"clean_ec_confidence_min", "clean_ec_confidence_max"}
+
+
+@dataclass(frozen=True)
+class CompiledFilter:
+    """WHERE clause for a filter shape, with its placeholders numbered from start_param_idx + 1."""
+
+    shape: FilterShape
+    where_clause: str
+    start_param_idx: int
+
+    @property
+    def uses_confidence(self) -> bool:
+        """Whether the WHERE clause needs predictions_uniprot_annot_clean_ec_mv01 joined as puace."""
+        return any(name in CONFIDENCE_FILTERS for name, _ in self.shape)
+
+
+@lru_cache(maxsize=1024)
+def compile_filter(shape: FilterShape, start_param_idx: int = 0) -> CompiledFilter:
+    """Build the WHERE clause for a filter shape, combining the filters with AND logic."""
+    conditions = []
+    param_idx = start_param_idx
+    for name, count in shape:
+        placeholders = [f"${param_idx + i + 1}" for i in range(count)]
+        param_idx += count
+        conditions.append(_FILTERS_BY_NAME[name].sql(placeholders))
+
+    where_clause = " AND ".join(conditions) if conditions else "TRUE"
+    return CompiledFilter(shape, where_clause, start_param_idx)
+
+
+def compile_params(params: FilterParams, start_param_idx: int = 0) -> Tuple[CompiledFilter, List[Any]]:
+    """Get the compiled filter for the filters set in params, and the arguments to bind to it.
+
+    Filters of the same shape share one compiled filter, so only the arguments are built per call.
+    Raises ValueError if a filter value is invalid.
+    """
+    shape = []
+    args = []
+    for f in FILTERS:
+        filter_args = f.args(params)
+        if filter_args:
+            shape.append((f.name, len(filter_args)))
+            args += filter_args
+    return compile_filter(tuple(shape), start_param_idx), args
@@ -0,0 +1,72 @@
+-- Tables and materialized views queried by the API. Materialized views are created empty and
+-- populated by the provisioning command once created (or refreshed after loading data).
+
+CREATE TABLE IF NOT EXISTS cleandb.predictions_uniprot_annot (
+    predictions_uniprot_annot_id bigint PRIMARY KEY,
+    uniprot_id text,
+    curation_status text,
+    accession text,
+    protein_name text,
+    organism text,
+    ncbi_taxid integer,
+    amino_acids integer,
+    protein_sequence text,
+    enzyme_function text,
+    gene_name text
+);
+
+-- CLEAN predicted EC numbers, one row per prediction
+CREATE TABLE IF NOT EXISTS cleandb.predictions_uniprot_annot_clean_ec (
+    predictions_uniprot_annot_id bigint NOT NULL,
+    clean_ec_number text NOT NULL,
+    clean_ec_confidence double precision
+);
+
+-- UniProt annotated EC numbers, one row per annotation
+CREATE TABLE IF NOT EXISTS cleandb.predictions_uniprot_annot_ec (
+    predictions_uniprot_annot_id bigint NOT NULL,
+    annot_ec_number text NOT NULL
+);
+
+-- Names of EC classes ("1.-.-.-", "1.1.-.-", "1.1.1.-") and EC numbers
+CREATE TABLE IF NOT EXISTS cleandb.ec_class_names (
+    ec_number text PRIMARY KEY,
+    ec_name text
+);
+
+-- Predictions per record, most confident first
+CREATE MATERIALIZED VIEW IF NOT EXISTS cleandb.predictions_uniprot_annot_clean_ec_mv01 AS
+    SELECT
+        predictions_uniprot_annot_id,
+        array_agg(clean_ec_number ORDER BY clean_ec_confidence DESC) AS clean_ec_number_array,
+        array_agg(clean_ec_confidence ORDER BY clean_ec_confidence DESC) AS clean_ec_confidence_array,
+        max(clean_ec_confidence) AS max_clean_ec_confidence
+    FROM cleandb.predictions_uniprot_annot_clean_ec
+    GROUP BY predictions_uniprot_annot_id
+WITH NO DATA;
+
+-- Annotations per record
+CREATE MATERIALIZED VIEW IF NOT EXISTS cleandb.predictions_uniprot_annot_ec_mv01 AS
+    SELECT predictions_uniprot_annot_id, array_agg(annot_ec_number) AS annot_ec_number_array
+    FROM cleandb.predictions_uniprot_annot_ec
+    GROUP BY predictions_uniprot_annot_id
+WITH NO DATA;
+
+-- Distinct values for typeahead without search context
+CREATE MATERIALIZED VIEW IF NOT EXISTS cleandb.predictions_uniprot_annot_mv01 AS
+    SELECT DISTINCT organism, lower(organism) AS organism_lower
+    FROM cleandb.predictions_uniprot_annot
+    WHERE organism IS NOT NULL
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS cleandb.predictions_uniprot_annot_mv02 AS
+    SELECT DISTINCT protein_name, lower(protein_name) AS protein_name_lower
+    FROM cleandb.predictions_uniprot_annot
+    WHERE protein_name IS NOT NULL
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS cleandb.predictions_uniprot_annot_mv03 AS
+    SELECT DISTINCT gene_name, lower(gene_name) AS gene_name_lower
+    FROM cleandb.predictions_uniprot_annot
+    WHERE gene_name IS NOT NULL
+WITH NO DATA;
@@ -0,0 +1,63 @@
+-- B-tree indexes for the filters, orderings and joins of the search, count, facet and typeahead
+-- queries. Index names use the table aliases of the queries (pua, pce, puace, puae).
+
+-- Filters: accession is matched in uppercase, the other strings in lowercase (see app.db.filters)
+CREATE INDEX IF NOT EXISTS pua_accession_idx
+    ON cleandb.predictions_uniprot_annot (accession);
+CREATE INDEX IF NOT EXISTS pua_lower_protein_name_idx
+    ON cleandb.predictions_uniprot_annot (lower(protein_name));
+CREATE INDEX IF NOT EXISTS pua_lower_organism_idx
+    ON cleandb.predictions_uniprot_annot (lower(organism));
+CREATE INDEX IF NOT EXISTS pua_lower_gene_name_idx
+    ON cleandb.predictions_uniprot_annot (lower(gene_name));
+CREATE INDEX IF NOT EXISTS pua_lower_uniprot_id_idx
+    ON cleandb.predictions_uniprot_annot (lower(uniprot_id));
+CREATE INDEX IF NOT EXISTS pua_lower_curation_status_idx
+    ON cleandb.predictions_uniprot_annot (lower(curation_status));
+
+-- Accession typeahead matches prefixes (LIKE 'A0A1%'), which needs text_pattern_ops unless
+-- the database collation is C
+CREATE INDEX IF NOT EXISTS pua_accession_pattern_idx
+    ON cleandb.predictions_uniprot_annot (accession text_pattern_ops);
+
+-- Orderings, ending with the primary key like the ORDER BY of the search query, so a page is
+-- read from the index instead of sorting every match. amino_acids also serves sequence_length.
+CREATE INDEX IF NOT EXISTS pua_organism_idx
+    ON cleandb.predictions_uniprot_annot (organism, predictions_uniprot_annot_id);
+CREATE INDEX IF NOT EXISTS pua_curation_status_idx
+    ON cleandb.predictions_uniprot_annot (curation_status, predictions_uniprot_annot_id);
+-- Descending orderings keep the primary key ascending, which a backward scan cannot provide.
+-- Other columns have few ties per value, which an incremental sort handles.
+CREATE INDEX IF NOT EXISTS pua_curation_status_desc_idx
+    ON cleandb.predictions_uniprot_annot (curation_status DESC, predictions_uniprot_annot_id);
+CREATE INDEX IF NOT EXISTS pua_amino_acids_idx
+    ON cleandb.predictions_uniprot_annot (amino_acids, predictions_uniprot_annot_id);
+
+-- EC number filter: exact numbers and class prefixes (LIKE '1.2.%'), returning the record
+-- from the index
+CREATE INDEX IF NOT EXISTS pce_number_pattern_idx
+    ON cleandb.predictions_uniprot_annot_clean_ec (clean_ec_number text_pattern_ops, predictions_uniprot_annot_id);
+-- Predicted EC typeahead with search context joins the predictions of each record
+CREATE INDEX IF NOT EXISTS pce_record_idx
+    ON cleandb.predictions_uniprot_annot_clean_ec (predictions_uniprot_annot_id, clean_ec_number);
+
+-- Joins of the search query, and the default ordering by confidence
+CREATE UNIQUE INDEX IF NOT EXISTS puace_record_idx
+    ON cleandb.predictions_uniprot_annot_clean_ec_mv01 (predictions_uniprot_annot_id);
+CREATE INDEX IF NOT EXISTS puace_max_confidence_idx
+    ON cleandb.predictions_uniprot_annot_clean_ec_mv01 (max_clean_ec_confidence DESC, predictions_uniprot_annot_id);
+CREATE UNIQUE INDEX IF NOT EXISTS puae_record_idx
+    ON cleandb.predictions_uniprot_annot_ec_mv01 (predictions_uniprot_annot_id);
+
+-- EC lookup of class prefixes
+CREATE INDEX IF NOT EXISTS ec_class_names_pattern_idx
+    ON cleandb.ec_class_names (ec_number text_pattern_ops);
+
+-- Typeahead views, in the order of their suggestions. Unique indexes also allow
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY.
+CREATE UNIQUE INDEX IF NOT EXISTS mv01_organism_idx
+    ON cleandb.predictions_uniprot_annot_mv01 (organism);
+CREATE UNIQUE INDEX IF NOT EXISTS mv02_protein_name_idx
+    ON cleandb.predictions_uniprot_annot_mv02 (protein_name);
+CREATE UNIQUE INDEX IF NOT EXISTS mv03_gene_name_idx
+    ON cleandb.predictions_uniprot_annot_mv03 (gene_name);
@@ -0,0 +1,24 @@
+-- requires: pg_trgm
+-- Trigram indexes for the substring matches (LIKE '%term%') of typeahead and EC lookup, which
+-- B-tree indexes cannot serve.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS pua_organism_trgm_idx
+    ON cleandb.predictions_uniprot_annot USING gin (lower(organism) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS pua_protein_name_trgm_idx
+    ON cleandb.predictions_uniprot_annot USING gin (lower(protein_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS pua_gene_name_trgm_idx
+    ON cleandb.predictions_uniprot_annot USING gin (lower(gene_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS pua_uniprot_id_trgm_idx
+    ON cleandb.predictions_uniprot_annot USING gin (lower(uniprot_id) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS mv01_organism_trgm_idx
+    ON cleandb.predictions_uniprot_annot_mv01 USING gin (organism_lower gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS mv02_protein_name_trgm_idx
+    ON cleandb.predictions_uniprot_annot_mv02 USING gin (protein_name_lower gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS mv03_gene_name_trgm_idx
+    ON cleandb.predictions_uniprot_annot_mv03 USING gin (gene_name_lower gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS ec_class_names_name_trgm_idx
+    ON cleandb.ec_class_names USING gin (lower(ec_name) gin_trgm_ops);
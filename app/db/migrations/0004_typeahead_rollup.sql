@@ -0,0 +1,60 @@
+-- Distinct typeahead values per field, curation status and confidence band, with their number of
+-- records, so typeahead with a curation status and/or confidence floor context does not join and
+-- deduplicate the records. Bands are numbered like ceil(confidence * 10) - 1: band b holds the
+-- records whose maximum CLEAN confidence is in (b / 10, (b + 1) / 10], -1 those at or below 0,
+-- and NULL those without predictions. They are compared with the same double precision bounds as
+-- the clean_ec_confidence_min filter (confidence > b / 10), so band >= b matches it exactly.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS cleandb.predictions_uniprot_annot_mv04 AS
+    WITH records AS (
+        SELECT
+            pua.predictions_uniprot_annot_id,
+            pua.organism,
+            pua.protein_name,
+            pua.gene_name,
+            lower(pua.curation_status) AS curation_status,
+            CASE
+                WHEN confidence.max_confidence > 1.0 THEN 10
+                WHEN confidence.max_confidence > 0.9 THEN 9
+                WHEN confidence.max_confidence > 0.8 THEN 8
+                WHEN confidence.max_confidence > 0.7 THEN 7
+                WHEN confidence.max_confidence > 0.6 THEN 6
+                WHEN confidence.max_confidence > 0.5 THEN 5
+                WHEN confidence.max_confidence > 0.4 THEN 4
+                WHEN confidence.max_confidence > 0.3 THEN 3
+                WHEN confidence.max_confidence > 0.2 THEN 2
+                WHEN confidence.max_confidence > 0.1 THEN 1
+                WHEN confidence.max_confidence > 0.0 THEN 0
+                WHEN confidence.max_confidence IS NOT NULL THEN -1
+            END AS confidence_band
+        FROM cleandb.predictions_uniprot_annot pua
+        -- From the predictions rather than predictions_uniprot_annot_clean_ec_mv01, so the views
+        -- can be refreshed in any order
+        LEFT JOIN (
+            SELECT predictions_uniprot_annot_id, max(clean_ec_confidence) AS max_confidence
+            FROM cleandb.predictions_uniprot_annot_clean_ec
+            GROUP BY predictions_uniprot_annot_id
+        ) confidence ON confidence.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id
+    )
+    SELECT field, value, lower(value) AS value_lower, curation_status, confidence_band, count(*) AS records
+    FROM (
+        SELECT 'organism' AS field, organism AS value, curation_status, confidence_band FROM records
+        UNION ALL
+        SELECT 'protein_name', protein_name, curation_status, confidence_band FROM records
+        UNION ALL
+        SELECT 'gene_name', gene_name, curation_status, confidence_band FROM records
+        UNION ALL
+        SELECT 'predicted_ec', pce.clean_ec_number, records.curation_status, records.confidence_band
+        FROM records
+        INNER JOIN cleandb.predictions_uniprot_annot_clean_ec pce
+            ON pce.predictions_uniprot_annot_id = records.predictions_uniprot_annot_id
+    ) field_values
+    WHERE value IS NOT NULL
+    GROUP BY field, value, curation_status, confidence_band
+WITH NO DATA;
+
+-- Values of a field in the order of their suggestions, and EC number prefixes (LIKE '1.2.%')
+CREATE INDEX IF NOT EXISTS mv04_field_value_idx
+    ON cleandb.predictions_uniprot_annot_mv04 (field, value);
+CREATE INDEX IF NOT EXISTS mv04_field_value_pattern_idx
+    ON cleandb.predictions_uniprot_annot_mv04 (field, value text_pattern_ops);
@@ -0,0 +1,7 @@
+-- requires: pg_trgm
+-- Substring matches (LIKE '%term%') of the typeahead rollup view.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS mv04_value_trgm_idx
+    ON cleandb.predictions_uniprot_annot_mv04 USING gin (value_lower gin_trgm_ops);
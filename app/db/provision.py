@@ -0,0 +1,223 @@
+"""Provision the cleandb schema: tables, materialized views and the indexes the queries rely on.
+
+Migrations are the SQL files of app/db/migrations, applied in the order of their version prefix
+(0001_schema.sql, 0002_...) and recorded in cleandb.schema_migrations, so each is applied once
+per database. A migration starting with a "-- requires: ext1, ext2" line is skipped, with a
+warning, while one of those extensions is not available on the server, and applied by a later
+run once it is.
+
+Usage:
+    python -m app.db.provision migrate   # apply pending migrations, populate new materialized views
+    python -m app.db.provision check     # report pending migrations, missing and unused indexes
+
+Connects with the CLEAN_DB_* settings, like the API. check exits with status 1 if migrations are
+pending or indexes are missing or invalid.
+"""
+import argparse
+import asyncio
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import asyncpg
+from loguru import logger
+
+MIGRATIONS_DIR = Path(__file__).with_name("migrations")
+
+MIGRATIONS_TABLE_DDL = """
+    CREATE SCHEMA IF NOT EXISTS cleandb;
+    CREATE TABLE IF NOT EXISTS cleandb.schema_migrations (
+        version text PRIMARY KEY,
+        name text NOT NULL,
+        applied_at timestamptz NOT NULL DEFAULT now()
+    );
+"""
+
+# Serializes concurrent migrate runs, e.g. from several replicas starting at once
+MIGRATION_LOCK_ID = 0x636C65616E  # "clean"
+
+_REQUIRES_PATTERN = re.compile(r"\A--\s*requires:\s*(.+)$", re.MULTILINE)
+_INDEX_PATTERN = re.compile(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+
+# Indexes of cleandb that have not been scanned since the statistics were reset. Unique indexes
+# are left out, since they enforce constraints whether or not queries use them.
+UNUSED_INDEXES_QUERY = """
+    SELECT s.indexrelname AS index, s.relname AS relation, pg_relation_size(s.indexrelid) AS size
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.schemaname = 'cleandb' AND s.idx_scan = 0 AND NOT i.indisunique
+    ORDER BY size DESC
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    name: str
+    sql: str
+    # Extensions that must be available on the server to apply the migration
+    requires: Tuple[str, ...]
+
+    @property
+    def indexes(self) -> List[str]:
+        """Names of the indexes the migration creates."""
+        return _INDEX_PATTERN.findall(self.sql)
+
+
+def load_migrations() -> List[Migration]:
+    """Read the migrations of MIGRATIONS_DIR, in the order they are applied."""
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        version, _, name = path.stem.partition("_")
+        sql = path.read_text()
+        requires = _REQUIRES_PATTERN.search(sql)
+        migrations.append(Migration(
+            version,
+            name,
+            sql,
+            tuple(ext.strip() for ext in requires.group(1).split(",")) if requires else (),
+        ))
+    return migrations
+
+
+async def _applied_versions(conn: asyncpg.Connection) -> set:
+    exists = await conn.fetchval("SELECT to_regclass('cleandb.schema_migrations') IS NOT NULL")
+    if not exists:
+        return set()
+    return {record["version"] for record in await conn.fetch("SELECT version FROM cleandb.schema_migrations")}
+
+
+async def _available_extensions(conn: asyncpg.Connection) -> set:
+    return {record["name"] for record in await conn.fetch("SELECT name FROM pg_available_extensions")}
+
+
+async def migrate(conn: asyncpg.Connection) -> List[str]:
+    """Apply the pending migrations, each in its own transaction, and populate new materialized views.
+
+    Returns the names of the migrations applied.
+    """
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        await conn.execute(MIGRATIONS_TABLE_DDL)
+        applied = await _applied_versions(conn)
+        available = await _available_extensions(conn)
+
+        applied_now = []
+        for migration in load_migrations():
+            if migration.version in applied:
+                continue
+            missing = [ext for ext in migration.requires if ext not in available]
+            if missing:
+                logger.warning(
+                    f"Skipping migration {migration.version}_{migration.name}: "
+                    f"extension {', '.join(missing)} not available"
+                )
+                continue
+            async with conn.transaction():
+                await conn.execute(migration.sql)
+                await conn.execute(
+                    "INSERT INTO cleandb.schema_migrations (version, name) VALUES ($1, $2)",
+                    migration.version, migration.name,
+                )
+            logger.info(f"Applied migration {migration.version}_{migration.name}")
+            applied_now.append(f"{migration.version}_{migration.name}")
+
+        # Queries fail on materialized views that were never refreshed
+        for record in await conn.fetch(
+            "SELECT matviewname FROM pg_matviews WHERE schemaname = 'cleandb' AND NOT ispopulated"
+        ):
+            await conn.execute(f"REFRESH MATERIALIZED VIEW cleandb.{record['matviewname']}")
+            logger.info(f"Populated materialized view cleandb.{record['matviewname']}")
+        return applied_now
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+
+async def check(conn: asyncpg.Connection) -> Dict[str, Any]:
+    """Compare a database with the migrations.
+
+    Returns the pending migrations, the indexes of applied migrations that are missing (e.g.
+    dropped by hand) or invalid (e.g. left by a failed CREATE INDEX), and the indexes never
+    scanned since the statistics were reset. Index usage statistics are per server, so check the one serving the API.
+    """
+    migrations = load_migrations()
+    applied = await _applied_versions(conn)
+    available = await _available_extensions(conn)
+
+    existing = {
+        record["indexname"]: record["valid"]
+        for record in await conn.fetch(
+            "SELECT c.relname AS indexname, i.indisvalid AS valid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relnamespace = to_regnamespace('cleandb')"
+        )
+    }
+
+    return {
+        "pending": [
+            {
+                "migration": f"{m.version}_{m.name}",
+                "missing_extensions": [ext for ext in m.requires if ext not in available],
+            }
+            for m in migrations
+            if m.version not in applied
+        ],
+        "missing_indexes": [
+            {"index": index, "migration": f"{m.version}_{m.name}"}
+            for m in migrations
+            if m.version in applied
+            for index in m.indexes
+            if index not in existing
+        ],
+        "invalid_indexes": [index for index, valid in existing.items() if not valid],
+        "unused_indexes": [dict(record) for record in await conn.fetch(UNUSED_INDEXES_QUERY)],
+        "stats_reset": await conn.fetchval(
+            "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+        ),
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    for pending in report["pending"]:
+        note = f" (extension {', '.join(pending['missing_extensions'])} not available)" if pending["missing_extensions"] else ""
+        print(f"PENDING migration {pending['migration']}{note}")
+    for missing in report["missing_indexes"]:
+        print(f"MISSING index {missing['index']} (migration {missing['migration']})")
+    for index in report["invalid_indexes"]:
+        print(f"INVALID index {index}: drop it and run migrate again")
+    since = f" since {report['stats_reset']:%Y-%m-%d %H:%M}" if report["stats_reset"] else ""
+    for unused in report["unused_indexes"]:
+        print(f"UNUSED index {unused['index']} on {unused['relation']} ({unused['size'] // 1024} kB), never scanned{since}")
+
+
+async def _run(command: str) -> int:
+    # Imported here, since the settings require the CLEAN_DB_* variables that migrate() does not
+    from app.db.database import get_connection
+
+    conn = await get_connection()
+    try:
+        if command == "migrate":
+            applied = await migrate(conn)
+            print(f"Applied {len(applied)} migrations" + (f": {', '.join(applied)}" if applied else ""))
+            return 0
+
+        report = await check(conn)
+        _print_report(report)
+        failed = report["pending"] or report["missing_indexes"] or report["invalid_indexes"]
+        if not failed:
+            print("Schema up to date")
+        return 1 if failed else 0
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["migrate", "check"])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.command)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,26 @@
-from typing import Any, Dict, List, Tuple
-
-import rich
-import re
+import asyncio
+import base64
+import json
+from decimal import Decimal
+from typing import Any, AsyncGenerator, Callable, Dict, List, Tuple
+
+import asyncpg
+from app.core.config import settings
+from app.core.metrics import observe_phase
+from app.db.cache import result_cache
 from app.db.database import Database
+from app.db.ec_index import ec_index
+from app.db.filters import CompiledFilter, compile_params
+from app.db.typeahead_index import typeahead_index
 from app.models.clean_data import CLEANColumn
-from app.models.query_params import CLEANECLookupQueryParams, CLEANSearchQueryParams, CLEANTypeaheadQueryParams
+from app.models.query_params import CLEANECLookupQueryParams, CLEANSearchQueryParams, CLEANTypeaheadQueryParams, CountMode, TypeaheadOrder
 
-async def build_conditions(
+def build_conditions(
     params: CLEANSearchQueryParams,
-) -> Tuple[str, Dict[str, Any]]:
-    """Build SQL query conditions from query parameters."""
-    conditions = []
-    query_params = {}
-    param_idx = 0
-
-    # Process string filters (case-insensitive exact matches with OR logic within columns)
-    string_columns = {
-        "accession": params.accession,
-        "protein_name": params.protein_name,
-        "organism": params.organism,
-        "gene_name": params.gene_name,
-        "uniprot_id": params.uniprot_id,
-    }
-
-    for column, values in string_columns.items():
-        rich.print(f"Processing column: {column} with values: {values}")
-        if values:
-            column_conditions = []
-
-            for value in values:
-                param_idx += 1
-                param_name = f"param_{param_idx}"
-
-                if column == "accession":
-                    # accessions are stored and indexed in uppercase
-                    column_conditions.append(f"{column} = UPPER(${param_idx})")
-                    query_params[param_name] = value
-                else:
-                    column_conditions.append(f"LOWER({column}) = LOWER(${param_idx})")
-                    query_params[param_name] = value
-
-            if column_conditions:
-                conditions.append(f"({' OR '.join(column_conditions)})")
-
-    if params.clean_ec_number is not None:
-        column_conditions = []
-
-        for value in params.clean_ec_number:
-            param_idx += 1
-            param_name = f"param_{param_idx}"
-
-            # for EC numbers, we allow dashes as wildcards matching the end of the string (e.g., "1.2.-.-"), which is the convention used in the ec_class_names table
-            if value.endswith("-"):
-                column_conditions.append(f"clean_ec_number LIKE ${param_idx}")
-                query_params[param_name] = re.sub(r'-.*$', '%', value)
-            else:
-                column_conditions.append(f"clean_ec_number = ${param_idx}")
-                query_params[param_name] = value
-        if column_conditions:
-            conditions.append(f"pua.predictions_uniprot_annot_id IN (SELECT predictions_uniprot_annot_id FROM cleandb.predictions_uniprot_annot_clean_ec WHERE " + " OR ".join(column_conditions) + ")")
-
-    if params.clean_ec_confidence_min is not None:
-        param_idx += 1
-        param_name = f"param_{param_idx}"
-        conditions.append(f"max_clean_ec_confidence > ${param_idx}")
-        query_params[param_name] = params.clean_ec_confidence_min
-
-    if params.clean_ec_confidence_max is not None:
-        param_idx += 1
-        param_name = f"param_{param_idx}"
-        conditions.append(f"max_clean_ec_confidence < ${param_idx}")
-        query_params[param_name] = params.clean_ec_confidence_max
-
-    if params.sequence_length is not None:
-        param_idx += 1
-        param_name = f"param_{param_idx}"
-        conditions.append(f"amino_acids >= ${param_idx}")
-        query_params[param_name] = params.sequence_length
-
-    if params.curation_status is not None:
-        column_conditions = []
-        for value in params.curation_status:
-            param_idx += 1
-            param_name = f"param_{param_idx}"
-            column_conditions.append(f"LOWER(curation_status) = LOWER(${param_idx})")
-            query_params[param_name] = value
-        if column_conditions:
-            conditions.append(f"({' OR '.join(column_conditions)})")
-
-    # Combine all conditions with AND logic
-    where_clause = " AND ".join(conditions) if conditions else "TRUE"
-
-    return where_clause, query_params
+) -> Tuple[str, List[Any]]:
+    """Build the SQL WHERE clause and its arguments from query parameters."""
+    compiled, args = compile_params(params)
+    return compiled.where_clause, args
 
 SORTABLE_COLUMNS = {
     "accession": "pua.accession",
@@ -101,7 +30,35 @@ SORTABLE_COLUMNS = {
     "predicted_ec": "puace.max_clean_ec_confidence",
 }
 
-DEFAULT_ORDER_BY = "puace.max_clean_ec_confidence DESC, pua.amino_acids ASC, pua.predictions_uniprot_annot_id ASC"
+DEFAULT_ORDER_KEYS = [
+    ("puace.max_clean_ec_confidence", "DESC"),
+    ("pua.amino_acids", "ASC"),
+    ("pua.predictions_uniprot_annot_id", "ASC"),
+]
+
+DEFAULT_ORDER_BY = ", ".join(f"{col} {direction}" for col, direction in DEFAULT_ORDER_KEYS)
+
+
+def normalize_ordering(ordering: str | None) -> str:
+    """Return the canonical form of an ordering string ('' for the default ordering)."""
+    if not ordering or ordering.lstrip("-") not in SORTABLE_COLUMNS:
+        return ""
+    return ordering
+
+
+def get_order_keys(ordering: str | None) -> List[Tuple[str, str]]:
+    """Resolve an ordering string like '-accession' into a list of (column, direction) sort keys.
+
+    The last key is always the primary key, so the ordering is total and can be used for keyset pagination.
+    Returns the default sort keys if ordering is None or invalid.
+    """
+    ordering = normalize_ordering(ordering)
+    if not ordering:
+        return DEFAULT_ORDER_KEYS
+
+    direction = "DESC" if ordering.startswith("-") else "ASC"
+    col = SORTABLE_COLUMNS[ordering.lstrip("-")]
+    return [(col, direction), ("pua.predictions_uniprot_annot_id", "ASC")]
 
 
 def parse_ordering(ordering: str | None) -> str:
@@ -109,197 +66,427 @@ def parse_ordering(ordering: str | None) -> str:
 
     Returns the default ordering if ordering is None or invalid.
     """
-    if not ordering:
-        return DEFAULT_ORDER_BY
+    return ", ".join(f"{col} {direction}" for col, direction in get_order_keys(ordering))
+
+
+def _cursor_json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def _cursor_json_object_hook(obj: Dict[str, Any]) -> Any:
+    if obj.keys() == {"$dec"}:
+        return Decimal(obj["$dec"])
+    return obj
+
+
+def _is_integer(bits: int) -> Callable[[Any], bool]:
+    return lambda value: (
+        isinstance(value, int) and not isinstance(value, bool) and -(2 ** (bits - 1)) <= value < 2 ** (bits - 1)
+    )
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _is_text(value: Any) -> bool:
+    # Postgres text cannot hold NUL characters
+    return isinstance(value, str) and "\x00" not in value
 
-    descending = ordering.startswith("-")
-    field = ordering.lstrip("-")
 
-    if field not in SORTABLE_COLUMNS:
-        return DEFAULT_ORDER_BY
+# Whether a cursor value can be bound to each sort key column, by column type (NULLs aside)
+SORT_KEY_VALIDATORS: Dict[str, Callable[[Any], bool]] = {
+    "pua.accession": _is_text,
+    "pua.amino_acids": _is_integer(32),
+    "pua.organism": _is_text,
+    "pua.curation_status": _is_text,
+    "puace.max_clean_ec_confidence": _is_number,
+    "pua.predictions_uniprot_annot_id": _is_integer(64),
+}
+
+
+def encode_cursor(ordering: str | None, record: Dict[str, Any]) -> str:
+    """Encode the sort key of a result row into an opaque pagination cursor.
+
+    The row must contain every sort key column for the ordering (see `get_order_keys`).
+    """
+    values = [record[col.split(".", 1)[1]] for col, _ in get_order_keys(ordering)]
+    payload = json.dumps(
+        {"o": normalize_ordering(ordering), "k": values},
+        default=_cursor_json_default,
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, ordering: str | None) -> List[Any]:
+    """Decode a pagination cursor into the sort key values of the last row of the previous page.
+
+    Raises ValueError if the cursor is malformed, has values of the wrong type for their sort
+    columns, or was issued for a different ordering.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw, object_hook=_cursor_json_object_hook)
+        cursor_ordering, values = payload["o"], payload["k"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    if cursor_ordering != normalize_ordering(ordering):
+        raise ValueError("Cursor was issued for a different ordering")
+    order_keys = get_order_keys(ordering)
+    if not isinstance(values, list) or len(values) != len(order_keys):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    for (col, _), value in zip(order_keys, values):
+        if value is not None and not SORT_KEY_VALIDATORS[col](value):
+            raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+def build_keyset_condition(
+    ordering: str | None, values: List[Any], start_param_idx: int = 0
+) -> Tuple[str, List[Any]]:
+    """Build a WHERE condition selecting the rows that sort strictly after the given sort key values.
+
+    Follows Postgres NULL ordering (NULLS LAST for ASC, NULLS FIRST for DESC), so nullable sort
+    columns page correctly. Returns the condition and the arguments to bind, numbered from
+    start_param_idx + 1.
+    """
+    order_keys = get_order_keys(ordering)
+    query_args = []
+    placeholders = []
+    for value in values:
+        if value is None:
+            placeholders.append(None)
+        else:
+            query_args.append(value)
+            placeholders.append(f"${start_param_idx + len(query_args)}")
+
+    def equal(i: int) -> str:
+        col = order_keys[i][0]
+        return f"{col} IS NULL" if placeholders[i] is None else f"{col} = {placeholders[i]}"
+
+    def after(i: int) -> str | None:
+        col, direction = order_keys[i]
+        if direction == "ASC":
+            return None if placeholders[i] is None else f"({col} > {placeholders[i]} OR {col} IS NULL)"
+        return f"{col} IS NOT NULL" if placeholders[i] is None else f"{col} < {placeholders[i]}"
+
+    terms = []
+    for i in range(len(order_keys)):
+        term = after(i)
+        if term is not None:
+            terms.append(" AND ".join([equal(j) for j in range(i)] + [term]))
+
+    if not terms:
+        return "FALSE", query_args
+
+    # Redundant bound on the leading sort key so the planner can use it as an index range
+    leading_col, leading_direction = order_keys[0]
+    if placeholders[0] is None:
+        leading_bound = f"{leading_col} IS NULL" if leading_direction == "ASC" else None
+    elif leading_direction == "ASC":
+        leading_bound = f"({leading_col} >= {placeholders[0]} OR {leading_col} IS NULL)"
+    else:
+        leading_bound = f"{leading_col} <= {placeholders[0]}"
+
+    condition = "(" + " OR ".join(f"({term})" for term in terms) + ")"
+    if leading_bound:
+        condition = f"{leading_bound} AND {condition}"
+    return condition, query_args
 
-    direction = "DESC" if descending else "ASC"
-    col = SORTABLE_COLUMNS[field]
-    return f"{col} {direction}, pua.predictions_uniprot_annot_id ASC"
 
+def get_query(
+    columns_to_select: str,
+    where_clause: str,
+    include_order_by: bool = True,
+    ordering: str | None = None,
+    include_annot_ec: bool = True,
+) -> str:
+    """Build the search query.
 
-def get_query(columns_to_select: str, where_clause: str, include_order_by: bool = True, ordering: str | None = None) -> str:
+    The LEFT JOIN to the annotated EC numbers never changes which rows match, so it is only
+    included when include_annot_ec is set, for selecting annot_ec_number_array.
+    """
     query = f"""
     SELECT
         {columns_to_select}
     FROM cleandb.predictions_uniprot_annot pua
     INNER JOIN cleandb.predictions_uniprot_annot_clean_ec_mv01 puace
-        ON puace.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id
+        ON puace.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id"""
+    if include_annot_ec:
+        query += """
     LEFT JOIN cleandb.predictions_uniprot_annot_ec_mv01 puae
-        ON puae.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id
+        ON puae.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id"""
+    query += f"""
     WHERE {where_clause}"""
     if include_order_by:
         query += f"""
     ORDER BY {parse_ordering(ordering)}"""
     return query
 
-async def get_filtered_data(
-    db: Database, params: CLEANSearchQueryParams
-) -> List[Dict[str, Any]]:
-    """Get filtered data from the database."""
-    where_clause, query_params = await build_conditions(params)
-
-    columns_to_select = """
-        pua.predictions_uniprot_annot_id,
-        pua.uniprot_id,
-        pua.curation_status,
-        pua.accession,
-        pua.protein_name,
-        pua.organism,
-        pua.ncbi_taxid,
-        pua.amino_acids,
-        pua.protein_sequence,
-        pua.enzyme_function,
-        pua.gene_name,
-        puace.clean_ec_number_array,
-        puace.clean_ec_confidence_array,
-        puae.annot_ec_number_array
+# SQL expression for each selectable column of the search query
+SEARCH_COLUMNS = {
+    CLEANColumn.predictions_uniprot_annot_id: "pua.predictions_uniprot_annot_id",
+    CLEANColumn.uniprot_id: "pua.uniprot_id",
+    CLEANColumn.curation_status: "pua.curation_status",
+    CLEANColumn.accession: "pua.accession",
+    CLEANColumn.protein_name: "pua.protein_name",
+    CLEANColumn.organism: "pua.organism",
+    CLEANColumn.ncbi_taxid: "pua.ncbi_taxid",
+    CLEANColumn.amino_acids: "pua.amino_acids",
+    CLEANColumn.protein_sequence: "pua.protein_sequence",
+    CLEANColumn.enzyme_function: "pua.enzyme_function",
+    CLEANColumn.gene_name: "pua.gene_name",
+    CLEANColumn.clean_ec_number_array: "puace.clean_ec_number_array",
+    CLEANColumn.clean_ec_confidence_array: "puace.clean_ec_confidence_array::float8[] AS clean_ec_confidence_array",
+    CLEANColumn.annot_ec_number_array: "puae.annot_ec_number_array",
+}
+
+# Columns of the search query needed for each field of CLEANDataBase, in response order
+FIELD_COLUMNS = {
+    "predictions_uniprot_annot_id": [CLEANColumn.predictions_uniprot_annot_id],
+    "uniprot": [CLEANColumn.uniprot_id],
+    "curation_status": [CLEANColumn.curation_status],
+    "accession": [CLEANColumn.accession],
+    "protein": [CLEANColumn.protein_name],
+    "organism": [CLEANColumn.organism],
+    "ncbi_tax_id": [CLEANColumn.ncbi_taxid],
+    "amino_acids": [CLEANColumn.amino_acids],
+    "sequence": [CLEANColumn.protein_sequence],
+    "function": [CLEANColumn.enzyme_function],
+    "gene_name": [CLEANColumn.gene_name],
+    "predicted_ec": [CLEANColumn.clean_ec_number_array, CLEANColumn.clean_ec_confidence_array],
+    "annot_ec_number_array": [CLEANColumn.annot_ec_number_array],
+}
+
+
+def get_field_columns(fields: List[str] | None) -> List[CLEANColumn]:
+    """Get the search columns needed for the given response fields (all columns if None)."""
+    if not fields:
+        return list(SEARCH_COLUMNS)
+    return list(dict.fromkeys(column for field in fields for column in FIELD_COLUMNS[field]))
+
+
+async def build_filtered_data_query(
+    params: CLEANSearchQueryParams,
+    columns: List[CLEANColumn] | None = None,
+    paginate: bool = True,
+    conditions: Tuple[str, List[Any]] | None = None,
+) -> Tuple[str, List[Any]]:
+    """Build the search query and its arguments from query parameters.
+
+    Selects the given columns, or if None, the columns for params.fields (all of them by default)
+    plus the sort key columns needed for cursors.
+    When paginate is False, limit and offset are ignored, but a cursor still sets the starting row.
+    Pass conditions to reuse the output of `build_conditions` for the same params.
     """
+    where_clause, query_args = conditions or build_conditions(params)
+    query_args = list(query_args)
+
+    if params.cursor:
+        keyset_clause, keyset_args = build_keyset_condition(
+            params.ordering,
+            decode_cursor(params.cursor, params.ordering),
+            start_param_idx=len(query_args),
+        )
+        where_clause = f"{where_clause} AND {keyset_clause}"
+        query_args += keyset_args
+
+    if columns is None:
+        # Columns for the requested response fields, plus the sort keys needed for cursors
+        select_list = [SEARCH_COLUMNS[column] for column in get_field_columns(params.fields)]
+        select_list += [col for col, _ in get_order_keys(params.ordering) if col not in select_list]
+    else:
+        select_list = [SEARCH_COLUMNS[column] for column in columns]
+    columns_to_select = ",\n        ".join(select_list)
 
     # Build the main query
-    query = get_query(columns_to_select, where_clause, ordering=params.ordering)
+    query = get_query(
+        columns_to_select,
+        where_clause,
+        ordering=params.ordering,
+        include_annot_ec=SEARCH_COLUMNS[CLEANColumn.annot_ec_number_array] in select_list,
+    )
 
-    # Add pagination
-    if params.limit is not None:
-        query += f" LIMIT {params.limit}"
+    # Add pagination, bound as parameters so pages share the same statement
+    if paginate and params.limit is not None:
+        query_args += [params.limit, 0 if params.cursor else params.offset or 0]
+        query += f" LIMIT ${len(query_args) - 1} OFFSET ${len(query_args)}"
 
-    if params.offset is not None:
-        query += f" OFFSET {params.offset}"
+    return query, query_args
 
-    rich.print(f"{query=}")
-    # Extract query parameters from the dictionary
-    query_args = list(query_params.values())
+
+async def get_filtered_data(
+    db: Database,
+    params: CLEANSearchQueryParams,
+    conditions: Tuple[str, List[Any]] | None = None,
+) -> List[Dict[str, Any]]:
+    """Get filtered data from the database.
+
+    When params.cursor is set, rows are selected with a keyset condition on the sort key
+    instead of OFFSET, so every page costs about the same as the first one.
+    """
+    with observe_phase("sql_build"):
+        query, query_args = await build_filtered_data_query(params, conditions=conditions)
 
     # Execute the query
-    records = await db.fetch(query, *query_args)
+    with observe_phase("data_query"):
+        records = await db.fetch(query, *query_args)
     return records
 
 
-async def get_total_count(db: Database, params: CLEANSearchQueryParams) -> int:
-    """Get total count of records matching the filters."""
-    where_clause, query_params = await build_conditions(params)
+async def iterate_filtered_data(
+    db: Database,
+    params: CLEANSearchQueryParams,
+    columns: List[CLEANColumn] | None = None,
+    paginate: bool = True,
+    prefetch: int = 1000,
+) -> AsyncGenerator[asyncpg.Record, None]:
+    """Stream filtered data from the database through a server-side cursor."""
+    query, query_args = await build_filtered_data_query(params, columns, paginate=paginate)
+
+    async for record in db.iterate(query, *query_args, prefetch=prefetch):
+        yield record
 
-    query = get_query("COUNT(*)", where_clause, include_order_by=False)
 
-    # Extract query parameters from the dictionary
-    query_args = list(query_params.values())
+async def get_total_count(
+    db: Database,
+    params: CLEANSearchQueryParams,
+    conditions: Tuple[str, List[Any]] | None = None,
+) -> int:
+    """Get total count of records matching the filters."""
+    with observe_phase("sql_build"):
+        where_clause, query_args = conditions or build_conditions(params)
+        query = get_query("COUNT(*)", where_clause, include_order_by=False, include_annot_ec=False)
 
     # Execute the query
-    result = await db.fetchval(query, *query_args)
+    with observe_phase("count_query"):
+        result = await db.fetchval(query, *query_args)
     return result
 
-def _has_search_context(params: CLEANTypeaheadQueryParams) -> bool:
-    """Check if any search context filters are provided."""
-    return any([
-        params.accession,
-        params.organism,
-        params.protein_name,
-        params.gene_name,
-        params.uniprot_id,
-        params.clean_ec_number,
-        params.curation_status,
-        params.clean_ec_confidence_min,
-        params.clean_ec_confidence_max,
-        params.sequence_length,
-    ])
-
-
-def _build_typeahead_context_conditions(
-    params: CLEANTypeaheadQueryParams,
-    start_param_idx: int = 1,
-) -> Tuple[str, Dict[str, Any], int]:
-    """Build SQL conditions from typeahead context parameters."""
-    conditions = []
-    query_params = {}
-    param_idx = start_param_idx
-
-    # Process string filters (case-insensitive exact matches with OR logic within columns)
-    string_columns = {
-        "accession": params.accession,
-        "protein_name": params.protein_name,
-        "organism": params.organism,
-        "gene_name": params.gene_name,
-        "uniprot_id": params.uniprot_id,
-    }
 
-    for column, values in string_columns.items():
-        if values:
-            column_conditions = []
-            for value in values:
-                param_idx += 1
-                param_name = f"param_{param_idx}"
-                if column == "accession":
-                    column_conditions.append(f"pua.{column} = UPPER(${param_idx})")
-                else:
-                    column_conditions.append(f"LOWER(pua.{column}) = LOWER(${param_idx})")
-                query_params[param_name] = value
-            if column_conditions:
-                conditions.append(f"({' OR '.join(column_conditions)})")
-
-    if params.clean_ec_number is not None:
-        column_conditions = []
-        for value in params.clean_ec_number:
-            param_idx += 1
-            param_name = f"param_{param_idx}"
-            if value.endswith("-"):
-                column_conditions.append(f"puace.clean_ec_number LIKE ${param_idx}")
-                query_params[param_name] = re.sub(r'-.*$', '%', value)
-            else:
-                column_conditions.append(f"puace.clean_ec_number = ${param_idx}")
-                query_params[param_name] = value
-        if column_conditions:
-            conditions.append(f"({' OR '.join(column_conditions)})")
+async def get_estimated_count(
+    db: Database,
+    params: CLEANSearchQueryParams,
+    conditions: Tuple[str, List[Any]] | None = None,
+) -> int:
+    """Get the planner's row estimate for the records matching the filters.
+
+    Only plans the query, so it costs about the same regardless of how many rows match.
+    """
+    with observe_phase("sql_build"):
+        where_clause, query_args = conditions or build_conditions(params)
+        query = "EXPLAIN (FORMAT JSON) " + get_query("1", where_clause, include_order_by=False, include_annot_ec=False)
+
+    with observe_phase("count_query"):
+        plan = await db.fetchval(query, *query_args)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def get_filtered_data_and_count(
+    db: Database, params: CLEANSearchQueryParams
+) -> Tuple[List[Dict[str, Any]], int | None]:
+    """Get a page of filtered data and the count of matching records.
+
+    The WHERE clause is built once and both queries run concurrently on separate pool
+    connections. The count follows params.count: exact COUNT(*), planner estimate, or None.
+    Results for pages of up to CACHE_MAX_ENTRY_ROWS rows are cached.
+    """
+    return await result_cache.get_or_set(
+        "search",
+        params,
+        lambda: _get_filtered_data_and_count(db, params),
+        exclude={"auto_paginated", "format", "columns", "export_all"},
+        cacheable=params.limit is not None and params.limit <= settings.CACHE_MAX_ENTRY_ROWS,
+    )
+
+
+async def _get_filtered_data_and_count(
+    db: Database, params: CLEANSearchQueryParams
+) -> Tuple[List[Dict[str, Any]], int | None]:
+    with observe_phase("sql_build"):
+        conditions = build_conditions(params)
+
+    if params.count == CountMode.NONE:
+        return await get_filtered_data(db, params, conditions), None
 
+    count_query = get_estimated_count if params.count == CountMode.ESTIMATE else get_total_count
+    data, total_count = await asyncio.gather(
+        get_filtered_data(db, params, conditions),
+        count_query(db, params, conditions),
+    )
+    return data, total_count
+
+
+# Typeahead rollup view (created by migration 0004), used once populated, and the search context
+# filters it can apply
+ROLLUP_VIEW = "predictions_uniprot_annot_mv04"
+ROLLUP_FILTERS = {"curation_status", "clean_ec_confidence_min"}
+
+
+def _rollup_context(
+    params: CLEANTypeaheadQueryParams, context: CompiledFilter, start_param_idx: int
+) -> Tuple[str, List[Any]] | None:
+    """Build the conditions on the typeahead rollup view for the search context, and their arguments.
+
+    Returns None if the rollup cannot answer the context: it only has curation statuses and
+    confidence bands of 0.1, so the confidence floor must be a multiple of 0.1 between 0 and 1.
+    """
+    names = {name for name, _ in context.shape}
+    if not settings.TYPEAHEAD_ROLLUP_ENABLED or not names or not names <= ROLLUP_FILTERS:
+        return None
+
+    conditions = []
+    args = []
     if params.clean_ec_confidence_min is not None:
-        param_idx += 1
-        param_name = f"param_{param_idx}"
-        conditions.append(f"puace.clean_ec_confidence > ${param_idx}")
-        query_params[param_name] = params.clean_ec_confidence_min
-
-    if params.clean_ec_confidence_max is not None:
-        param_idx += 1
-        param_name = f"param_{param_idx}"
-        conditions.append(f"puace.clean_ec_confidence < ${param_idx}")
-        query_params[param_name] = params.clean_ec_confidence_max
-
-    if params.sequence_length is not None:
-        param_idx += 1
-        param_name = f"param_{param_idx}"
-        conditions.append(f"pua.amino_acids >= ${param_idx}")
-        query_params[param_name] = params.sequence_length
-
-    if params.curation_status is not None:
-        column_conditions = []
-        for value in params.curation_status:
-            param_idx += 1
-            param_name = f"param_{param_idx}"
-            column_conditions.append(f"LOWER(pua.curation_status) = LOWER(${param_idx})")
-            query_params[param_name] = value
-        if column_conditions:
-            conditions.append(f"({' OR '.join(column_conditions)})")
-
-    where_clause = " AND ".join(conditions) if conditions else "TRUE"
-    return where_clause, query_params, param_idx
+        band = round(params.clean_ec_confidence_min * 10)
+        if not 0 <= band <= 10 or band / 10 != params.clean_ec_confidence_min:
+            return None
+        args.append(band)
+        conditions.append(f"confidence_band >= ${start_param_idx + len(args)}")
+    if params.curation_status:
+        args.append([value.lower() for value in params.curation_status])
+        conditions.append(f"curation_status = ANY(${start_param_idx + len(args)}::text[])")
+    return " AND ".join(conditions), args
 
 
 async def get_typeahead_suggestions(db: Database, params: CLEANTypeaheadQueryParams
-) -> Tuple[List[str], int]:
+) -> Tuple[List[str], int, bool]:
     """Get typeahead suggestions based on the query parameters.
 
-    Returns a tuple of (matches, total_count).
+    Returns a tuple of (matches, total_count, total_capped), where total_capped tells whether
+    total_count was capped at TYPEAHEAD_COUNT_CAP. Substring matches ('%term%') are served by the
+    trigram indexes of the pg_trgm extension, which also ranks suggestions by similarity to the
+    search term when requested; without the extension, the closest matches are approximated as
+    exact matches, then prefix matches, then the shortest values. Alphabetical queries without search
+    context are answered from the in-memory typeahead index when it is enabled and ready, and
+    queries whose search context only has curation statuses and a confidence floor from the
+    typeahead rollup view. Other results are cached.
     """
+    if typeahead_index.answers(params):
+        with observe_phase("index_lookup"):
+            return typeahead_index.search(params)
+
+    return await result_cache.get_or_set(
+        "typeahead", params, lambda: _get_typeahead_suggestions(db, params)
+    )
+
+
+async def _get_typeahead_suggestions(db: Database, params: CLEANTypeaheadQueryParams
+) -> Tuple[List[str], int, bool]:
     search = params.search.strip()
     if len(search) < 3:
         raise ValueError("Search term must be at least 3 characters long.")
 
     limit = params.limit or 20
     offset = params.offset or 0
-    has_context = _has_search_context(params)
+    # The search term will be $1, context params start from $2
+    context, context_args = compile_params(params, start_param_idx=1)
 
     # Field-specific configuration
     field_config = {
@@ -309,7 +496,7 @@ async def get_typeahead_suggestions(db: Database, params: CLEANTypeaheadQueryPar
             'mv_table': None,
             'mv_search_condition': None,
             'column': 'accession',
-            'result_column': 'accession',
+            'rollup_search_condition': None,
         },
         'organism': {
             'search_pattern': lambda s: '%' + s + '%',  # match anywhere
@@ -317,7 +504,7 @@ async def get_typeahead_suggestions(db: Database, params: CLEANTypeaheadQueryPar
             'mv_table': 'cleandb.predictions_uniprot_annot_mv01',
             'mv_search_condition': 'organism_lower LIKE LOWER($1)',
             'column': 'organism',
-            'result_column': 'organism',
+            'rollup_search_condition': 'value_lower LIKE LOWER($1)',
         },
         'protein_name': {
             'search_pattern': lambda s: '%' + s + '%',
@@ -325,7 +512,7 @@ async def get_typeahead_suggestions(db: Database, params: CLEANTypeaheadQueryPar
             'mv_table': 'cleandb.predictions_uniprot_annot_mv02',
             'mv_search_condition': 'protein_name_lower LIKE LOWER($1)',
             'column': 'protein_name',
-            'result_column': 'protein_name',
+            'rollup_search_condition': 'value_lower LIKE LOWER($1)',
         },
         'gene_name': {
             'search_pattern': lambda s: '%' + s + '%',
@@ -333,7 +520,7 @@ async def get_typeahead_suggestions(db: Database, params: CLEANTypeaheadQueryPar
             'mv_table': 'cleandb.predictions_uniprot_annot_mv03',
             'mv_search_condition': 'gene_name_lower LIKE LOWER($1)',
             'column': 'gene_name',
-            'result_column': 'gene_name',
+            'rollup_search_condition': 'value_lower LIKE LOWER($1)',
         },
         'uniprot_id': {
             'search_pattern': lambda s: '%' + s + '%',
@@ -341,15 +528,15 @@ async def get_typeahead_suggestions(db: Database, params: CLEANTypeaheadQueryPar
             'mv_table': None,
             'mv_search_condition': None,
             'column': 'uniprot_id',
-            'result_column': 'uniprot_id',
+            'rollup_search_condition': None,
         },
         'predicted_ec': {
             'search_pattern': lambda s: s + '%',  # match beginning of EC number
-            'search_condition': 'puace.clean_ec_number LIKE $1',
+            'search_condition': 'pce.clean_ec_number LIKE $1',
             'mv_table': None,
             'mv_search_condition': None,
             'column': 'clean_ec_number',
-            'result_column': 'clean_ec_number',
+            'rollup_search_condition': 'value LIKE $1',
         },
     }
 
@@ -358,87 +545,125 @@ async def get_typeahead_suggestions(db: Database, params: CLEANTypeaheadQueryPar
 
     config = field_config[params.field_name]
     search_term = config['search_pattern'](search)
+    rollup = (
+        _rollup_context(params, context, start_param_idx=1)
+        if config['rollup_search_condition'] and ROLLUP_VIEW in db.populated_views
+        else None
+    )
 
-    if not has_context:
+    if not context.shape:
         # No search context - use materialized views for better performance when available
         if params.field_name == 'predicted_ec':
             # Query the EC table directly
-            count_query = f"""SELECT COUNT(DISTINCT clean_ec_number) FROM cleandb.predictions_uniprot_annot_clean_ec WHERE clean_ec_number LIKE $1"""
-            data_query = f"""SELECT DISTINCT clean_ec_number FROM cleandb.predictions_uniprot_annot_clean_ec WHERE clean_ec_number LIKE $1 ORDER BY 1 ASC LIMIT {limit} OFFSET {offset}"""
+            select_column = "clean_ec_number"
+            from_where = "FROM cleandb.predictions_uniprot_annot_clean_ec WHERE clean_ec_number LIKE $1"
         elif config['mv_table']:
             # Use materialized view
-            count_query = f"""SELECT COUNT(DISTINCT {config['column']}) FROM {config['mv_table']} WHERE {config['mv_search_condition']}"""
-            data_query = f"""SELECT DISTINCT {config['column']} FROM {config['mv_table']} WHERE {config['mv_search_condition']} ORDER BY 1 ASC LIMIT {limit} OFFSET {offset}"""
+            select_column = config['column']
+            from_where = f"FROM {config['mv_table']} WHERE {config['mv_search_condition']}"
         else:
             # Query main table directly
-            count_query = f"""SELECT COUNT(DISTINCT {config['column']}) FROM cleandb.predictions_uniprot_annot pua WHERE {config['search_condition']}"""
-            data_query = f"""SELECT DISTINCT {config['column']} FROM cleandb.predictions_uniprot_annot pua WHERE {config['search_condition']} ORDER BY 1 ASC LIMIT {limit} OFFSET {offset}"""
-
-        total = await db.fetchval(count_query, search_term)
-        records = await db.fetch(data_query, search_term)
-        return [record[config['result_column']] for record in records], total
+            select_column = config['column']
+            from_where = f"FROM cleandb.predictions_uniprot_annot pua WHERE {config['search_condition']}"
+
+    elif rollup is not None:
+        # Search context of curation statuses and/or a confidence floor - use the typeahead rollup view
+        rollup_conditions, context_args = rollup
+        select_column = "value"
+        from_where = f"""
+                FROM cleandb.predictions_uniprot_annot_mv04
+                WHERE field = '{params.field_name}'
+                    AND {config['rollup_search_condition']}
+                    AND {rollup_conditions}
+            """
 
     else:
-        # Has search context - need to join with main table and apply filters
-        context_where, context_params, param_idx = _build_typeahead_context_conditions(params, start_param_idx=1)
-
-        # The search term will be $1, context params start from $2
-        # Rebuild context conditions with offset
-        context_where, context_params, _ = _build_typeahead_context_conditions(params, start_param_idx=1)
-
-        # Build the query based on field type
+        # Has search context - need to join with main table and apply the same filters as search
+        joins = ""
         if params.field_name == 'predicted_ec':
-            # Need to join with EC table
-            base_query = f"""
-                FROM cleandb.predictions_uniprot_annot pua
-                INNER JOIN cleandb.predictions_uniprot_annot_clean_ec puace
-                    ON puace.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id
-                WHERE puace.clean_ec_number LIKE $1
-                    AND {context_where}
-            """
-            select_column = "puace.clean_ec_number"
+            # Need to join with EC table for the suggested values
+            joins += """
+                INNER JOIN cleandb.predictions_uniprot_annot_clean_ec pce
+                    ON pce.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id"""
+            select_column = "pce.clean_ec_number"
         else:
-            # Check if we need to join with EC table for context filtering
-            needs_ec_join = params.clean_ec_number is not None or params.clean_ec_confidence_min is not None or params.clean_ec_confidence_max is not None
-
-            if needs_ec_join:
-                base_query = f"""
-                    FROM cleandb.predictions_uniprot_annot pua
-                    INNER JOIN cleandb.predictions_uniprot_annot_clean_ec puace
-                        ON puace.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id
-                    WHERE {config['search_condition']}
-                        AND {context_where}
-                """
-            else:
-                base_query = f"""
-                    FROM cleandb.predictions_uniprot_annot pua
-                    WHERE {config['search_condition']}
-                        AND {context_where}
-                """
             select_column = f"pua.{config['column']}"
 
-        count_query = f"SELECT COUNT(*) FROM (SELECT DISTINCT {select_column} {base_query}) sub"
-        data_query = f"SELECT DISTINCT {select_column} {base_query} ORDER BY 1 ASC LIMIT {limit} OFFSET {offset}"
+        if context.uses_confidence:
+            joins += """
+                INNER JOIN cleandb.predictions_uniprot_annot_clean_ec_mv01 puace
+                    ON puace.predictions_uniprot_annot_id = pua.predictions_uniprot_annot_id"""
 
-        # Build query args: search_term first, then context params
-        query_args = [search_term] + list(context_params.values())
+        from_where = f"""
+                FROM cleandb.predictions_uniprot_annot pua{joins}
+                WHERE {config['search_condition']}
+                    AND {context.where_clause}
+            """
 
-        total = await db.fetchval(count_query, *query_args)
-        records = await db.fetch(data_query, *query_args)
-        return [record[config['result_column']] for record in records], total
+    # Matches are computed once and both counted and paged, in a single round trip. Counting
+    # stops after TYPEAHEAD_COUNT_CAP matches (or the end of the page, if further), so the
+    # database only sorts that many instead of every match; LIMIT NULL means no cap.
+    param_idx = 1 + len(context_args)
+    if params.order == TypeaheadOrder.SIMILARITY:
+        # Distinct values are ranked by an array of scores, highest first, against the lowercase
+        # search term bound last. Trigram similarity only tells substring matches apart.
+        term = f"${param_idx + 4}::text"
+        if "pg_trgm" in db.extensions and search_term.startswith('%'):
+            rank = f"ARRAY[word_similarity({term}, lower(value)), similarity({term}, lower(value))]"
+        else:
+            rank = f"ARRAY[(lower(value) = {term})::int, starts_with(lower(value), {term})::int, -length(value)]"
+        matches_query = f"""
+            SELECT value, {rank} AS rank
+            FROM (SELECT DISTINCT {select_column} AS value {from_where}) distinct_matches
+            ORDER BY rank DESC, value ASC"""
+        order_by = "rank DESC, value ASC"
+    else:
+        matches_query = f"""
+            SELECT DISTINCT {select_column} AS value {from_where}
+            ORDER BY 1 ASC"""
+        order_by = "1 ASC"
+    query = f"""
+        WITH matches AS MATERIALIZED ({matches_query}
+            LIMIT ${param_idx + 1}
+        )
+        SELECT
+            (SELECT COUNT(*) FROM matches) AS total,
+            ARRAY(SELECT value FROM matches ORDER BY {order_by} LIMIT ${param_idx + 2} OFFSET ${param_idx + 3}) AS matches
+    """
+
+    count_cap = max(settings.TYPEAHEAD_COUNT_CAP, offset + limit) if settings.TYPEAHEAD_COUNT_CAP > 0 else None
+    # Search term first, then context params
+    query_args = [search_term] + context_args
+    # One more match than the cap is fetched to tell whether the cap was reached
+    query_args += [count_cap + 1 if count_cap is not None else None, limit, offset]
+    if params.order == TypeaheadOrder.SIMILARITY:
+        query_args.append(search.lower())
+
+    with observe_phase("data_query"):
+        records = await db.fetch(query, *query_args)
+    total = records[0]['total']
+    total_capped = count_cap is not None and total > count_cap
+    return records[0]['matches'], min(total, count_cap) if total_capped else total, total_capped
 
 async def get_ec_suggestions(db: Database, params: CLEANECLookupQueryParams
 ) -> List[Dict[str, str]]:
-    """Look up EC numbers or names based on the query parameters."""
+    """Look up EC numbers or names based on the query parameters.
+
+    Lookups are answered from the in-memory EC index, or from the database until it is loaded.
+    """
+    if ec_index.loaded:
+        with observe_phase("index_lookup"):
+            return ec_index.search(params.search, params.limit or 10)
+
     search = params.search.strip()
 
     # match numbers at the beginning of the string
     number_search = search + '%'
     # match names anywhere in the string
     name_search = '%' + search + '%'
-    query = f"""SELECT ec_number, ec_name FROM cleandb.ec_class_names WHERE ec_number LIKE $1 OR LOWER(ec_name) LIKE LOWER($2) ORDER BY 1 ASC"""
-    query += f" LIMIT {params.limit or 10}"
+    query = f"""SELECT ec_number, ec_name FROM cleandb.ec_class_names WHERE ec_number LIKE $1 OR LOWER(ec_name) LIKE LOWER($2) ORDER BY 1 ASC LIMIT $3"""
 
     # Execute the query
-    records = await db.fetch(query, number_search, name_search)
+    with observe_phase("data_query"):
+        records = await db.fetch(query, number_search, name_search, params.limit or 10)
     return [{ 'ec_number': record['ec_number'], 'ec_name': record['ec_name'] } for record in records]
\ No newline at end of file
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import random
+from collections import deque
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, List, Sequence
+
+from loguru import logger
+
+from app.core.metrics import current_route
+from app.models.admin import SlowQueryEntry
+
+if TYPE_CHECKING:
+    from app.db.database import Database
+
+# Longest parameter value kept in the log when parameters are not redacted
+MAX_PARAM_LENGTH = 200
+
+
+def redact_params(args: Sequence[Any], redact: bool) -> List[Any]:
+    """Prepare bound parameters for the log, replacing values with their type names if redact is set."""
+    if redact:
+        return [f"<{type(arg).__name__}>" for arg in args]
+
+    params = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)) and len(arg) > 10:
+            arg = list(arg[:10]) + [f"... {len(arg) - 10} more"]
+        if not isinstance(arg, (int, float, bool, type(None))):
+            arg = str(arg)[:MAX_PARAM_LENGTH]
+        params.append(arg)
+    return params
+
+
+class SlowQueryLog:
+    """Bounded log of queries slower than a threshold, with sampled execution plans.
+
+    Plans are captured by re-running a sample of the slow queries with
+    EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) in a read-only transaction, in the background
+    and at most one at a time, so plan capture cannot pile up load on the database.
+    """
+
+    def __init__(self, threshold_ms: float, max_entries: int, explain_sample_rate: float, redact: bool):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.redact = redact
+        self.entries: deque[SlowQueryEntry] = deque(maxlen=max_entries)
+        self._explain_lock = asyncio.Lock()
+        self._explain_tasks: set[asyncio.Task] = set()
+
+    def record(self, db: "Database", query: str, args: Sequence[Any], duration_ms: float) -> None:
+        """Log the query if it was slow, and schedule plan capture if it is sampled."""
+        if self.threshold_ms < 0 or duration_ms < self.threshold_ms:
+            return
+
+        entry = SlowQueryEntry(
+            timestamp=datetime.now(timezone.utc),
+            duration_ms=round(duration_ms, 3),
+            route=current_route(),
+            query=query,
+            params=redact_params(args, self.redact),
+        )
+        self.entries.append(entry)
+        logger.warning(f"Slow query ({duration_ms:.0f} ms) on {entry.route}")
+
+        if (
+            query.lstrip().upper().startswith("SELECT")
+            and random.random() < self.explain_sample_rate
+            and not self._explain_lock.locked()
+        ):
+            task = asyncio.create_task(self._capture_plan(db, entry, query, args))
+            self._explain_tasks.add(task)
+            task.add_done_callback(self._explain_tasks.discard)
+
+    async def _capture_plan(self, db: "Database", entry: SlowQueryEntry, query: str, args: Sequence[Any]) -> None:
+        async with self._explain_lock:
+            try:
+                async with db.acquire() as conn:
+                    async with conn.transaction(readonly=True):
+                        plan = await conn.fetchval(
+                            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *args
+                        )
+                entry.plan = json.loads(plan) if isinstance(plan, str) else plan
+            except Exception as e:
+                entry.plan_error = str(e)
+                logger.error(f"Failed to capture plan for slow query: {e}")
+
+    def list(self) -> List[SlowQueryEntry]:
+        """Get the logged slow queries, most recent first."""
+        return list(reversed(self.entries))
+
+    def clear(self) -> None:
+        """Drop all logged slow queries."""
+        self.entries.clear()
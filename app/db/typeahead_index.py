@@ -0,0 +1,164 @@
+import asyncio
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.db.database import Database
+from app.db.filters import compile_params
+from app.models.query_params import CLEANTypeaheadQueryParams, TypeaheadOrder
+
+# Distinct values of each indexed field with the lowercase form they are matched on, in the order
+# the database returns typeahead suggestions (ORDER BY 1), so results are identical to the queries
+FIELD_QUERIES = {
+    "organism": """
+        SELECT DISTINCT organism AS value, organism_lower AS match_value
+        FROM cleandb.predictions_uniprot_annot_mv01 WHERE organism IS NOT NULL ORDER BY 1""",
+    "protein_name": """
+        SELECT DISTINCT protein_name AS value, protein_name_lower AS match_value
+        FROM cleandb.predictions_uniprot_annot_mv02 WHERE protein_name IS NOT NULL ORDER BY 1""",
+    "gene_name": """
+        SELECT DISTINCT gene_name AS value, gene_name_lower AS match_value
+        FROM cleandb.predictions_uniprot_annot_mv03 WHERE gene_name IS NOT NULL ORDER BY 1""",
+    "predicted_ec": """
+        SELECT DISTINCT clean_ec_number AS value, clean_ec_number AS match_value
+        FROM cleandb.predictions_uniprot_annot_clean_ec WHERE clean_ec_number IS NOT NULL ORDER BY 1""",
+}
+
+# EC numbers are matched at the beginning and case-sensitively, the other fields anywhere
+PREFIX_FIELDS = {"predicted_ec"}
+
+# Characters with a special meaning in LIKE patterns. Terms containing them are left to the
+# database, which treats them as wildcards.
+LIKE_SPECIAL_CHARACTERS = ("%", "_", "\\")
+
+NGRAM_SIZE = 3
+
+
+@dataclass(frozen=True)
+class _FieldIndex:
+    """Distinct values of a field, in result order, with an index for substring or prefix lookups."""
+
+    values: List[str]
+    match_values: List[str]
+    # Substring fields: positions of the values containing each trigram, ascending
+    ngrams: Dict[str, array]
+    # Prefix fields: match values sorted, with the position of each
+    sorted_match_values: List[str]
+    sorted_positions: array
+
+    @classmethod
+    def build(cls, records: List[dict], prefix: bool) -> "_FieldIndex":
+        values = [record["value"] for record in records]
+        match_values = [record["match_value"] or "" for record in records]
+        ngrams = defaultdict(lambda: array("I"))
+        sorted_match_values = []
+        sorted_positions = array("I")
+        if prefix:
+            order = sorted(range(len(values)), key=match_values.__getitem__)
+            sorted_match_values = [match_values[position] for position in order]
+            sorted_positions = array("I", order)
+        else:
+            for position, match_value in enumerate(match_values):
+                for ngram in {match_value[i:i + NGRAM_SIZE] for i in range(len(match_value) - NGRAM_SIZE + 1)}:
+                    ngrams[ngram].append(position)
+        return cls(values, match_values, dict(ngrams), sorted_match_values, sorted_positions)
+
+    def _substring_positions(self, term: str) -> List[int]:
+        # Values containing the term contain each of its trigrams, so the postings of the rarest
+        # one are the only candidates
+        postings = [self.ngrams.get(term[i:i + NGRAM_SIZE], ()) for i in range(len(term) - NGRAM_SIZE + 1)]
+        candidates = min(postings, key=len)
+        return [position for position in candidates if term in self.match_values[position]]
+
+    def _prefix_positions(self, term: str) -> List[int]:
+        positions = []
+        for i in range(bisect_left(self.sorted_match_values, term), len(self.sorted_match_values)):
+            if not self.sorted_match_values[i].startswith(term):
+                break
+            positions.append(self.sorted_positions[i])
+        return sorted(positions)
+
+    def search(self, term: str, prefix: bool, limit: int, offset: int) -> Tuple[List[str], int]:
+        positions = self._prefix_positions(term) if prefix else self._substring_positions(term.lower())
+        return [self.values[position] for position in positions[offset:offset + limit]], len(positions)
+
+
+class TypeaheadIndex:
+    """In-memory index of the distinct typeahead values, answering typeahead without search context.
+
+    Built from the same views as the typeahead queries and rebuilt in the background when the
+    data changes. The previous index keeps answering while it is rebuilt. Queries are left to the
+    database until the index is first built, and after a failed rebuild.
+    """
+
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+        self.ready = False
+        self._indexes: Dict[str, _FieldIndex] = {}
+        self._build_task: Optional[asyncio.Task] = None
+
+    async def _build(self, db: Database) -> None:
+        indexes = {}
+        for field in self.fields:
+            records = await db.fetch(FIELD_QUERIES[field])
+            # Built off the event loop, since large fields take a while
+            indexes[field] = await asyncio.to_thread(_FieldIndex.build, records, field in PREFIX_FIELDS)
+            logger.info(f"Indexed {len(records)} distinct {field} values for typeahead")
+        self._indexes = indexes
+        self.ready = True
+
+    async def _build_or_log(self, db: Database) -> None:
+        try:
+            await self._build(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The previous index no longer matches the data
+            self.ready = False
+            logger.error(f"Failed to build the typeahead index: {e}")
+
+    async def rebuild(self, db: Database) -> None:
+        """Start rebuilding the index in the background, replacing any rebuild in progress.
+
+        Returns without waiting for the rebuild, so it can be used as a data version listener.
+        """
+        self.stop()
+        self._build_task = asyncio.create_task(self._build_or_log(db))
+
+    def stop(self) -> None:
+        """Cancel any rebuild in progress."""
+        if self._build_task and not self._build_task.done():
+            self._build_task.cancel()
+
+    def answers(self, params: CLEANTypeaheadQueryParams) -> bool:
+        """Whether the index can answer a typeahead query with the same result as the database."""
+        search = (params.search or "").strip()
+        return (
+            self.ready
+            and params.order == TypeaheadOrder.ALPHABETICAL
+            and params.field_name in self._indexes
+            and len(search) >= NGRAM_SIZE
+            and not any(character in search for character in LIKE_SPECIAL_CHARACTERS)
+            and not compile_params(params)[0].shape
+        )
+
+    def search(self, params: CLEANTypeaheadQueryParams) -> Tuple[List[str], int, bool]:
+        """Get a page of the values matching the search term, and the exact number of matching values.
+
+        Returns the same (matches, total, total_capped) tuple as get_typeahead_suggestions.
+        """
+        matches, total = self._indexes[params.field_name].search(
+            params.search.strip(),
+            prefix=params.field_name in PREFIX_FIELDS,
+            limit=params.limit or 20,
+            offset=params.offset or 0,
+        )
+        return matches, total, False
+
+
+typeahead_index = TypeaheadIndex(settings.TYPEAHEAD_INDEX_FIELDS)
@@ -1,12 +1,22 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from loguru import logger
 
 from app.core.config import settings
+from app.core.logging import configure_logging
+from app.core.metrics import MetricsMiddleware, register_pool_collector, render_metrics
+from app.db.cache import result_cache
 from app.db.database import _db
-from app.routers import search
+from app.db.ec_index import ec_index
+from app.db.facets import refresh_unfiltered_facets, stop_precomputing_facets
+from app.db.typeahead_index import typeahead_index
+from app.routers import admin, search
+
+configure_logging()
 
 
 @asynccontextmanager
@@ -14,9 +24,38 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for database connection handling."""
     # Connect to database on startup
     await _db.connect()
+
+    # Keep the result cache in sync with the data
+    await result_cache.refresh_data_version(_db)
+    version_watcher = asyncio.create_task(
+        result_cache.watch_data_version(_db, settings.CACHE_VERSION_POLL_SECONDS)
+    )
+
+    # Re-read the extensions and populated views that optional query paths depend on
+    result_cache.add_version_listener(lambda version: _db.load_catalog())
+
+    # Serve EC lookups from memory, reloading the EC class names whenever the data changes
+    await ec_index.refresh(_db)
+    result_cache.add_version_listener(lambda version: ec_index.refresh(_db))
+
+    # Serve typeahead without search context from memory, rebuilding the index whenever the data changes
+    if settings.TYPEAHEAD_INDEX_ENABLED:
+        await typeahead_index.rebuild(_db)
+        result_cache.add_version_listener(lambda version: typeahead_index.rebuild(_db))
+
+    # Precompute the facets of all records in the background, and again whenever the data changes
+    await refresh_unfiltered_facets(_db)
+    result_cache.add_version_listener(lambda version: refresh_unfiltered_facets(_db))
+
     yield
+
+    version_watcher.cancel()
+    stop_precomputing_facets()
+    typeahead_index.stop()
     # Disconnect from database on shutdown
     await _db.disconnect()
+    # Flush queued log records
+    await logger.complete()
 
 
 # Initialize FastAPI application
@@ -95,5 +134,17 @@ app.add_middleware(
 # Add GZip compression middleware to compress large responses
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# Add metrics middleware last so it wraps everything else and measures compressed response sizes
+app.add_middleware(MetricsMiddleware)
+register_pool_collector(_db.pool_stats)
+
 # Include API routers
 app.include_router(search.router, prefix="/api/v1")
+app.include_router(admin.router, prefix="/api/v1")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Expose metrics in the Prometheus text format."""
+    content, content_type = render_metrics()
+    return Response(content, media_type=content_type)
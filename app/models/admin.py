@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class PoolStatsResponse(BaseModel):
+    """Model for the database connection pool statistics."""
+    min_size: int = Field(..., description="Configured minimum number of connections.")
+    max_size: int = Field(..., description="Configured maximum number of connections.")
+    size: int = Field(..., description="Current number of open connections.")
+    in_use: int = Field(..., description="Connections currently checked out by requests.")
+    idle: int = Field(..., description="Open connections waiting in the pool.")
+    waiters: int = Field(..., description="Requests currently waiting for a connection.")
+    acquire_count: int = Field(..., description="Connections acquired since startup.")
+    acquire_timeouts: int = Field(..., description="Acquisitions that timed out since startup.")
+    acquire_seconds_total: float = Field(..., description="Total time spent waiting for connections, in seconds.")
+    acquire_seconds_max: float = Field(..., description="Longest wait for a connection, in seconds.")
+    acquire_seconds_p50: Optional[float] = Field(None, description="Median wait over the last 1000 acquisitions, in seconds.")
+    acquire_seconds_p95: Optional[float] = Field(None, description="95th percentile wait over the last 1000 acquisitions, in seconds.")
+
+
+class SlowQueryEntry(BaseModel):
+    """Model for a query that took longer than the slow query threshold."""
+    timestamp: datetime = Field(..., description="When the query finished.")
+    duration_ms: float = Field(..., description="Query duration, in milliseconds.")
+    route: str = Field(..., description="Route of the request that ran the query.")
+    query: str = Field(..., description="SQL text of the query.")
+    params: List[Any] = Field([], description="Bound parameters, redacted to their types unless configured otherwise.")
+    plan: Optional[Any] = Field(None, description="Output of EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON), if the query was sampled.")
+    plan_error: Optional[str] = Field(None, description="Error raised while capturing the plan, if any.")
+
+
+class SlowQueryLogResponse(BaseModel):
+    """Model for the slow query log."""
+    threshold_ms: float = Field(..., description="Queries slower than this are logged, in milliseconds.")
+    explain_sample_rate: float = Field(..., description="Fraction of slow queries whose plan is captured.")
+    entries: List[SlowQueryEntry] = Field([], description="Logged slow queries, most recent first.")
@@ -3,6 +3,9 @@ from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
+from app.models.query_params import TypeaheadOrder
+
+
 class ECNumberConfidence(BaseModel):
     ec_number: str
     score: float
@@ -81,9 +84,13 @@ class CLEANDataBase(BaseModel):
 
 class CLEANSearchResponse(BaseModel):
     """Model for the response of a CLEAN search query."""
-    total: int = Field(
+    total: Optional[int] = Field(
         0,
-        description="Total number of records matching the query."
+        description="Total number of records matching the query. Null when the count was skipped (`count=none`)."
+    )
+    total_estimated: bool = Field(
+        False,
+        description="Whether `total` is a planner estimate rather than an exact count (`count=estimate`)."
     )
     limit: Optional[int] = Field(
         None,
@@ -105,6 +112,10 @@ class CLEANSearchResponse(BaseModel):
         None,
         description="Link to the previous page of results."
     )
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Opaque cursor for the next page of results. Pass it as `cursor` to page by keyset instead of offset."
+    )
     data: List[CLEANDataBase] = Field(
         [],
         description="List of records matching the query."
@@ -121,6 +132,10 @@ class CLEANTypeaheadResponse(BaseModel):
         min_length=3,
         description="Search term for typeahead suggestions (minimum 3 characters)"
     )
+    order: TypeaheadOrder = Field(
+        TypeaheadOrder.ALPHABETICAL,
+        description="Order of the suggestions: alphabetical, or closest to the search term first",
+    )
     matches: List[str] = Field(
         [],
         description="List of results matching the search term."
@@ -133,6 +148,10 @@ class CLEANTypeaheadResponse(BaseModel):
         0,
         description="Total number of matching results (before pagination)."
     )
+    total_capped: bool = Field(
+        False,
+        description="Whether counting stopped at a cap, in which case there are more than `total` matching results."
+    )
     limit: int = Field(
         20,
         description="Maximum number of results returned."
@@ -189,4 +208,92 @@ class CLEANCurationStatusResponse(BaseModel):
     statuses: List[CurationStatusOption] = Field(
         [],
         description="List of available curation status options."
-    )
\ No newline at end of file
+    )
+
+
+class FacetValue(BaseModel):
+    """Model for the number of matching records with a value."""
+    value: Optional[str] = Field(
+        None,
+        description="The value (null for records without one)."
+    )
+    count: int = Field(
+        0,
+        description="Number of matching records with this value."
+    )
+    name: Optional[str] = Field(
+        None,
+        description="Name of the EC class or number, for EC facets."
+    )
+
+
+class HistogramBin(BaseModel):
+    """Model for a histogram bin covering values from lower (inclusive) to upper (exclusive)."""
+    lower: float = Field(
+        ...,
+        description="Lower bound of the bin (inclusive)."
+    )
+    upper: float = Field(
+        ...,
+        description="Upper bound of the bin (exclusive, except for the last bin)."
+    )
+    count: int = Field(
+        0,
+        description="Number of matching records in the bin."
+    )
+
+
+class ECFacets(BaseModel):
+    """Model for the predicted EC number facets at each level of the EC hierarchy."""
+    level_1: List[FacetValue] = Field(
+        [],
+        description="EC classes (e.g. 1)."
+    )
+    level_2: List[FacetValue] = Field(
+        [],
+        description="EC subclasses (e.g. 1.1)."
+    )
+    level_3: List[FacetValue] = Field(
+        [],
+        description="EC sub-subclasses (e.g. 1.1.1)."
+    )
+    level_4: List[FacetValue] = Field(
+        [],
+        description="Full EC numbers (e.g. 1.1.1.1)."
+    )
+
+
+class CLEANFacetsResponse(BaseModel):
+    """Model for the response of the facets endpoint."""
+    total: Optional[int] = Field(
+        None,
+        description="Total number of matching records. Null when the curation_status facet is not requested."
+    )
+    predicted_ec: Optional[ECFacets] = Field(
+        None,
+        description="Number of matching records with a CLEAN predicted EC number in each EC class, most frequent first."
+    )
+    organism: Optional[List[FacetValue]] = Field(
+        None,
+        description="Most frequent organisms of the matching records."
+    )
+    organism_distinct: Optional[int] = Field(
+        None,
+        description="Number of distinct organisms of the matching records."
+    )
+    curation_status: Optional[List[FacetValue]] = Field(
+        None,
+        description="Number of matching records with each curation status."
+    )
+    sequence_length: Optional[List[HistogramBin]] = Field(
+        None,
+        description="Histogram of the sequence lengths of the matching records."
+    )
+    clean_ec_confidence: Optional[List[HistogramBin]] = Field(
+        None,
+        description="Histogram of the highest CLEAN prediction confidence of the matching records, from 0 to 1."
+    )
+    precomputed: bool = Field(
+        False,
+        description="Whether the facets were precomputed, which is the case for all records with default options."
+    )
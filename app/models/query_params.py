@@ -9,6 +9,24 @@ class ResponseFormat(str, Enum):
 
     JSON = "json"
     CSV = "csv"
+    NDJSON = "ndjson"
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
+class CountMode(str, Enum):
+    """Enum for how the total number of matching records is computed."""
+
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
+class TypeaheadOrder(str, Enum):
+    """Enum for the order of typeahead suggestions."""
+
+    ALPHABETICAL = "alphabetical"
+    SIMILARITY = "similarity"
 
 
 class CLEANSearchQueryParams(BaseModel):
@@ -61,18 +79,105 @@ class CLEANSearchQueryParams(BaseModel):
 
     # Response format and pagination
     format: Optional[ResponseFormat] = Field(
-        ResponseFormat.JSON, description="Response format (json or csv)"
+        ResponseFormat.JSON, description="Response format (json, csv, ndjson, arrow or parquet)"
+    )
+    fields: Optional[List[str]] = Field(
+        None, description="Fields to include in JSON and NDJSON records (all fields if not provided)"
+    )
+    columns: Optional[List[str]] = Field(
+        None, description="Columns to include in CSV, Arrow and Parquet exports (all columns if not provided)"
+    )
+    export_all: bool = Field(
+        False, description="Export every matching record, ignoring limit and offset (streaming formats only)"
+    )
+    limit: Optional[int] = Field(
+        None, description="Maximum number of records to return"
+    )
+    offset: Optional[int] = Field(0, description="Number of records to skip")
+    cursor: Optional[str] = Field(
+        None,
+        description="Opaque keyset pagination cursor (the `next_cursor` of a previous page). Overrides offset.",
+    )
+    count: CountMode = Field(
+        CountMode.EXACT,
+        description="How to compute the total: exact count, planner estimate, or none",
+    )
+    ordering: Optional[str] = Field(
+        None,
+        description="Column to sort by. Prefix with '-' for descending order. "
+        "Allowed values: accession, amino_acids, organism, curation_status, predicted_ec",
+    )
+
+class CLEANBulkSearchRequest(BaseModel):
+    """Request body for bulk searches by large lists of identifiers.
+
+    Field names match the query parameters of GET /search.
+    """
+
+    # Identifier lists (case-insensitive exact match, OR logic within each list)
+    accession: Optional[List[str]] = Field(
+        None, description="Uniprot Accessions"
+    )
+    uniprot: Optional[List[str]] = Field(
+        None, description="Uniprot IDs"
+    )
+    gene_name: Optional[List[str]] = Field(
+        None, description="Gene Names"
+    )
+
+    # Additional filters, as in GET /search
+    organism: Optional[List[str]] = Field(
+        None, description="Organism Name"
+    )
+    protein: Optional[List[str]] = Field(
+        None, description="Protein Name"
+    )
+    ec_number: Optional[List[str]] = Field(
+        None, description="CLEAN predicted EC number"
+    )
+    curation_status: Optional[List[str]] = Field(
+        None, description="Curation status (reviewed/unreviewed)"
+    )
+    clean_ec_confidence_min: Optional[float] = Field(
+        None, description="Minimum confidence for CLEAN predicted EC number"
+    )
+    clean_ec_confidence_max: Optional[float] = Field(
+        None, description="Maximum confidence for CLEAN predicted EC number"
+    )
+    sequence_length: Optional[str] = Field(
+        None, description="Minimum sequence length"
+    )
+
+    # Response format and pagination
+    format: ResponseFormat = Field(
+        ResponseFormat.JSON, description="Response format (json, csv, ndjson, arrow or parquet)"
+    )
+    fields: Optional[List[str]] = Field(
+        None, description="Fields to include in JSON and NDJSON records (all fields if not provided)"
+    )
+    columns: Optional[List[str]] = Field(
+        None, description="Columns to include in CSV, Arrow and Parquet exports (all columns if not provided)"
+    )
+    export_all: bool = Field(
+        False, description="Stream every matching record, ignoring limit and offset (not available for JSON)"
     )
     limit: Optional[int] = Field(
         None, description="Maximum number of records to return"
     )
     offset: Optional[int] = Field(0, description="Number of records to skip")
+    cursor: Optional[str] = Field(
+        None, description="Opaque keyset pagination cursor (the `next_cursor` of a previous page). Overrides offset."
+    )
+    count: CountMode = Field(
+        CountMode.EXACT, description="How to compute the total: exact count, planner estimate, or none"
+    )
     ordering: Optional[str] = Field(
         None,
         description="Column to sort by. Prefix with '-' for descending order. "
         "Allowed values: accession, amino_acids, organism, curation_status, predicted_ec",
     )
 
+
 class CLEANTypeaheadQueryParams(BaseModel):
     """Query parameters for CLEAN typeahead suggestions."""
 
@@ -91,6 +196,10 @@ class CLEANTypeaheadQueryParams(BaseModel):
     offset: Optional[int] = Field(
         0, description="Number of records to skip for pagination"
     )
+    order: TypeaheadOrder = Field(
+        TypeaheadOrder.ALPHABETICAL,
+        description="Order of the suggestions: alphabetical, or closest to the search term first",
+    )
 
     # Search context fields - when provided, typeahead results are filtered to match the current search context
     accession: Optional[List[str]] = Field(
@@ -133,4 +242,60 @@ class CLEANECLookupQueryParams(BaseModel):
     )
     limit: Optional[int] = Field(
         None, description="Maximum number of records to return"
-    )
\ No newline at end of file
+    )
+
+
+class FacetName(str, Enum):
+    """Enum for the facets computed by the facets endpoint."""
+
+    PREDICTED_EC = "predicted_ec"
+    ORGANISM = "organism"
+    CURATION_STATUS = "curation_status"
+    SEQUENCE_LENGTH = "sequence_length"
+    CLEAN_EC_CONFIDENCE = "clean_ec_confidence"
+
+
+class CLEANFacetQueryParams(BaseModel):
+    """Query parameters for CLEAN facet counts."""
+
+    facets: List[FacetName] = Field(
+        list(FacetName), description="Facets to compute"
+    )
+    limit: int = Field(
+        20, description="Maximum number of values returned for the organism and each EC level facet"
+    )
+    bins: int = Field(
+        10, description="Number of bins of the sequence length and confidence histograms"
+    )
+
+    # Filters, with the same meaning as for search
+    accession: Optional[List[str]] = Field(
+        None, description="Filter facets by accession"
+    )
+    organism: Optional[List[str]] = Field(
+        None, description="Filter facets by organism"
+    )
+    protein_name: Optional[List[str]] = Field(
+        None, description="Filter facets by protein name"
+    )
+    gene_name: Optional[List[str]] = Field(
+        None, description="Filter facets by gene name"
+    )
+    uniprot_id: Optional[List[str]] = Field(
+        None, description="Filter facets by uniprot ID"
+    )
+    clean_ec_number: Optional[List[str]] = Field(
+        None, description="Filter facets by CLEAN EC number"
+    )
+    curation_status: Optional[List[str]] = Field(
+        None, description="Filter facets by curation status"
+    )
+    clean_ec_confidence_min: Optional[float] = Field(
+        None, description="Filter facets by minimum CLEAN EC confidence"
+    )
+    clean_ec_confidence_max: Optional[float] = Field(
+        None, description="Filter facets by maximum CLEAN EC confidence"
+    )
+    sequence_length: Optional[str] = Field(
+        None, description="Filter facets by minimum sequence length"
+    )
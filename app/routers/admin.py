@@ -0,0 +1,52 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.core.config import settings
+from app.db.database import Database, get_db
+from app.models.admin import PoolStatsResponse, SlowQueryLogResponse
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Check the admin token. Admin endpoints are disabled when no token is configured."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not (x_admin_token and secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN)):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/pool", summary="Get database connection pool statistics")
+async def get_pool_stats(db: Database = Depends(get_db)) -> PoolStatsResponse:
+    """
+Get the current size and usage of the database connection pool, along with connection
+acquisition latency. Requires the `X-Admin-Token` header; disabled unless `ADMIN_TOKEN` is configured.
+    """
+    return PoolStatsResponse(**db.pool_stats())
+
+
+@router.get("/slow-queries", summary="Get recent slow queries")
+async def get_slow_queries(db: Database = Depends(get_db)) -> SlowQueryLogResponse:
+    """
+Get the most recent queries that took longer than `SLOW_QUERY_THRESHOLD_MS`, most recent first.
+A sample of slow queries (`SLOW_QUERY_EXPLAIN_SAMPLE_RATE`) is re-run in the background with
+`EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`, and the resulting plan is attached to the entry once
+it is available. Bound parameters are redacted to their types unless `SLOW_QUERY_REDACT_PARAMS`
+is disabled.
+    """
+    return SlowQueryLogResponse(
+        threshold_ms=db.slow_queries.threshold_ms,
+        explain_sample_rate=db.slow_queries.explain_sample_rate,
+        entries=db.slow_queries.list(),
+    )
+
+
+@router.delete("/slow-queries", summary="Clear the slow query log", status_code=204)
+async def clear_slow_queries(db: Database = Depends(get_db)) -> None:
+    """
+Drop all entries from the slow query log.
+    """
+    db.slow_queries.clear()
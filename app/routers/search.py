@@ -1,17 +1,22 @@
+import asyncio
 import csv
 from io import StringIO
-from typing import Any, List, Literal, Optional
+from typing import Any, AsyncGenerator, List, Literal, Optional
 from urllib.parse import urlencode
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from loguru import logger
 
 from app.core.config import settings
+from app.core.metrics import count_rows, observe_phase
+from app.core.serialization import dumps, record_to_data, search_response_json
+from app.db.arrow import get_arrow_schema, iterate_record_batches, stream_arrow_ipc, stream_parquet
 from app.db.database import Database, get_db
-from app.db.queries import get_ec_suggestions, get_filtered_data, get_total_count, get_typeahead_suggestions
-from app.models.query_params import CLEANECLookupQueryParams, CLEANSearchQueryParams, CLEANTypeaheadQueryParams, ResponseFormat
-from app.models.clean_data import CLEANDataBase, CLEANECLookupResponse, CLEANECLookupMatch, CLEANSearchResponse, CLEANTypeaheadResponse, CurationStatusOption, CLEANCurationStatusResponse
+from app.db.facets import get_facets
+from app.db.queries import FIELD_COLUMNS, SEARCH_COLUMNS, decode_cursor, encode_cursor, get_ec_suggestions, get_estimated_count, get_filtered_data_and_count, get_total_count, get_typeahead_suggestions, iterate_filtered_data
+from app.models.query_params import CLEANBulkSearchRequest, CLEANECLookupQueryParams, CLEANFacetQueryParams, CLEANSearchQueryParams, CLEANTypeaheadQueryParams, CountMode, FacetName, ResponseFormat, TypeaheadOrder
+from app.models.clean_data import CLEANColumn, CLEANECLookupResponse, CLEANECLookupMatch, CLEANFacetsResponse, CLEANSearchResponse, CLEANTypeaheadResponse, CurationStatusOption, CLEANCurationStatusResponse
 
 router = APIRouter(tags=["Search"])
 
@@ -58,48 +63,337 @@ def parse_query_params(
     ),
     # Response format and pagination
     format: ResponseFormat = Query(
-        default=ResponseFormat.JSON, description="Response format (json or csv)"
+        default=ResponseFormat.JSON, description="Response format (json, csv, ndjson, arrow or parquet)"
+    ),
+    fields: Optional[List[str]] = Query(
+        None,
+        description="Fields to include in JSON and NDJSON records (all fields if not provided). "
+        "Leaving out `sequence` and `function` makes responses much smaller. "
+        "Allowed values: " + ", ".join(FIELD_COLUMNS),
+    ),
+    columns: Optional[List[str]] = Query(
+        None,
+        description="Columns to include in CSV, Arrow and Parquet exports, in order (all columns if not provided). "
+        "Allowed values: " + ", ".join(column.value for column in SEARCH_COLUMNS),
+    ),
+    export_all: bool = Query(
+        False,
+        description="Stream every matching record, ignoring `limit` and `offset` (not available for JSON)",
     ),
     limit: Optional[int] = Query(
         None, description="Maximum number of records to return"
     ),
-    offset: Optional[int] = Query(0, description="Number of records to skip"),
+    offset: Optional[int] = Query(
+        None,
+        description="Number of records to skip (0 if not provided). Without an offset, the `next` "
+        "link pages by cursor when possible.",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque keyset pagination cursor taken from `next_cursor` of a previous page. "
+        "When provided, `offset` is ignored and the page starts right after the cursor row.",
+    ),
     ordering: Optional[str] = Query(
         None,
         description="Column to sort by. Prefix with '-' for descending order. "
         "Allowed values: accession, amino_acids, organism, curation_status, predicted_ec",
     ),
+    count: CountMode = Query(
+        default=CountMode.EXACT,
+        description="How to compute `total`: `exact` (COUNT), `estimate` (query planner estimate) "
+        "or `none` (skip counting, for cursor-based crawlers)",
+    ),
 ) -> CLEANSearchQueryParams:
     """Parse and validate query parameters."""
+    with observe_phase("param_parsing"):
+        try:
+            return _build_search_params(
+                accession=accession,
+                organism=organism,
+                protein=protein,
+                gene_name=gene_name,
+                ec_number=ec_number,
+                uniprot=uniprot,
+                curation_status=curation_status,
+                clean_ec_confidence_min=clean_ec_confidence_min,
+                clean_ec_confidence_max=clean_ec_confidence_max,
+                sequence_length=sequence_length,
+                format=format,
+                fields=fields,
+                columns=columns,
+                export_all=export_all,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                ordering=ordering,
+                count=count,
+            )
+        except Exception as e:
+            logger.error(f"Error parsing query parameters: {e}")
+            raise HTTPException(
+                status_code=400, detail=f"Invalid query parameters: {str(e)}"
+            )
+
+
+def _build_search_params(
+    accession: Optional[List[str]],
+    organism: Optional[List[str]],
+    protein: Optional[List[str]],
+    gene_name: Optional[List[str]],
+    ec_number: Optional[List[str]],
+    uniprot: Optional[List[str]],
+    curation_status: Optional[List[str]],
+    clean_ec_confidence_min: Optional[float],
+    clean_ec_confidence_max: Optional[float],
+    sequence_length: Optional[str],
+    format: ResponseFormat,
+    fields: Optional[List[str]],
+    columns: Optional[List[str]],
+    export_all: bool,
+    limit: Optional[int],
+    offset: Optional[int],
+    cursor: Optional[str],
+    ordering: Optional[str],
+    count: CountMode,
+) -> CLEANSearchQueryParams:
+    """Validate public search parameters and map them onto CLEANSearchQueryParams.
+
+    Raises ValueError if the parameters are invalid.
+    """
+    # Validate format
+    if format not in [fmt for fmt in ResponseFormat]:
+        format = ResponseFormat.JSON
+
+    # Validate cursor against the requested ordering
+    if cursor:
+        decode_cursor(cursor, ordering)
+
+    # Validate response fields, keeping them in response order
+    if fields:
+        invalid = [field for field in fields if field not in FIELD_COLUMNS]
+        if invalid:
+            raise ValueError(f"Invalid fields: {', '.join(invalid)}")
+        fields = [field for field in FIELD_COLUMNS if field in fields]
+
+    # Validate export columns
+    if columns:
+        columns = [CLEANColumn(column).value for column in columns]
+
+    if export_all and format == ResponseFormat.JSON:
+        raise ValueError("export_all requires a streaming format (csv, ndjson, arrow or parquet)")
+
+    return CLEANSearchQueryParams(
+        accession=accession,
+        protein_name=protein,
+        organism=organism,
+        gene_name=gene_name,
+        clean_ec_number=ec_number,
+        clean_ec_confidence_min = clean_ec_confidence_min,
+        clean_ec_confidence_max = clean_ec_confidence_max,
+        sequence_length = sequence_length,
+        uniprot_id = uniprot,
+        curation_status=curation_status,
+        format=format,
+        fields=fields,
+        columns=columns,
+        export_all=export_all,
+        limit=limit,
+        # Left unset when not given, so the pagination links can tell whether it was explicit
+        **({} if offset is None else {"offset": offset}),
+        cursor=cursor,
+        ordering=ordering,
+        count=count,
+    )
+
+
+def _build_search_link_params(params: CLEANSearchQueryParams) -> dict:
+    """Build the query string parameters (excluding pagination) that reproduce a search."""
+    link_params = {
+        "accession": params.accession,
+        "organism": params.organism,
+        "protein": params.protein_name,
+        "gene_name": params.gene_name,
+        "ec_number": params.clean_ec_number,
+        "uniprot": params.uniprot_id,
+        "curation_status": params.curation_status,
+        "clean_ec_confidence_min": params.clean_ec_confidence_min,
+        "clean_ec_confidence_max": params.clean_ec_confidence_max,
+        "sequence_length": params.sequence_length,
+        "ordering": params.ordering,
+        "fields": params.fields,
+    }
+    link_params = {k: v for k, v in link_params.items() if v is not None}
+
+    # Set format and count mode explicitly if they were provided
+    if params.format != ResponseFormat.JSON:
+        link_params["format"] = params.format.value
+    if params.count != CountMode.EXACT:
+        link_params["count"] = params.count.value
+
+    return link_params
+
+
+def _has_more_results(
+    params: CLEANSearchQueryParams, total_count: Optional[int], rows: int
+) -> bool:
+    """Check whether there are more results after the current page."""
+    if params.export_all or rows < params.limit:
+        return False
+    if params.cursor or total_count is None or params.count == CountMode.ESTIMATE:
+        # Without an exact total, a full page is taken to mean there may be more
+        return True
+    return (params.offset or 0) + params.limit < total_count
+
+
+def _build_next_cursor(
+    params: CLEANSearchQueryParams, total_count: Optional[int], rows: int, last_record: Any
+) -> Optional[str]:
+    """Build the cursor for the page after the current one, if there is one."""
+    if last_record is None or not _has_more_results(params, total_count, rows):
+        return None
+    return encode_cursor(params.ordering, last_record)
+
+
+def _build_pagination_links(
+    params: CLEANSearchQueryParams,
+    base_url: str,
+    has_more: bool,
+    next_cursor: Optional[str],
+) -> tuple[Optional[str], Optional[str]]:
+    """Build the next and previous page links for a search."""
+    next_url = None
+    previous_url = None
+
+    # Prepare query parameters for pagination links
+    query_params = _build_search_link_params(params)
+
+    current_offset = params.offset or 0
+    current_limit = params.limit
+
+    # Keyset pagination only moves forward. It is used for the next page whenever a cursor is
+    # available, unless the offset was given explicitly.
+    if params.cursor or (next_cursor and "offset" not in params.model_fields_set):
+        if next_cursor:
+            next_params = {
+                **query_params,
+                "cursor": next_cursor,
+                "limit": current_limit,
+            }
+            next_url = f"{base_url}?{urlencode(next_params, doseq=True)}"
+        return next_url, previous_url
+
+    # Next page link if there are more records
+    if has_more:
+        next_offset = current_offset + current_limit
+        next_params = {
+            **query_params,
+            "offset": next_offset,
+            "limit": current_limit,
+        }
+        next_url = f"{base_url}?{urlencode(next_params, doseq=True)}"
+
+    # Previous page link if not on first page
+    if current_offset > 0:
+        prev_offset = max(0, current_offset - current_limit)
+        prev_params = {
+            **query_params,
+            "offset": prev_offset,
+            "limit": current_limit,
+        }
+        previous_url = f"{base_url}?{urlencode(prev_params, doseq=True)}"
+
+    return next_url, previous_url
+
+
+async def _stream_ndjson(
+    db: Database, params: CLEANSearchQueryParams, base_url: Optional[str]
+) -> AsyncGenerator[bytes, None]:
+    """Stream search results as JSON Lines, one record per line.
+
+    The last line is a metadata object of the form {"_meta": {...}} holding the total count
+    and the cursor and link for the next page. The count runs concurrently on another
+    connection so it does not delay the first record.
+    """
+    chunk_size = settings.STREAMING_CHUNK_SIZE
+    count_task = None
+    if not params.export_all and params.count != CountMode.NONE:
+        count_query = get_estimated_count if params.count == CountMode.ESTIMATE else get_total_count
+        count_task = asyncio.create_task(count_query(db, params))
+    lines = []
+    rows = 0
+    last_record = None
     try:
-        # Validate format
-        if format not in [fmt for fmt in ResponseFormat]:
-            format = ResponseFormat.JSON
-
-        return CLEANSearchQueryParams(
-            accession=accession,
-            protein_name=protein,
-            organism=organism,
-            gene_name=gene_name,
-            clean_ec_number=ec_number,
-            clean_ec_confidence_min = clean_ec_confidence_min,
-            clean_ec_confidence_max = clean_ec_confidence_max,
-            sequence_length = sequence_length,
-            uniprot_id = uniprot,
-            curation_status=curation_status,
-            format=format,
-            limit=limit,
-            offset=offset,
-            ordering=ordering,
-        )
+        async for record in iterate_filtered_data(
+            db, params, paginate=not params.export_all, prefetch=chunk_size
+        ):
+            lines.append(dumps(record_to_data(record, params.fields)))
+            last_record = record
+            rows += 1
+            if len(lines) == chunk_size:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+
+        if count_task:
+            total_count = await count_task
+        else:
+            total_count = rows if params.export_all else None
     except Exception as e:
-        logger.error(f"Error parsing query parameters: {e}")
-        raise HTTPException(
-            status_code=400, detail=f"Invalid query parameters: {str(e)}"
+        # The response has already started, so the error can only be logged
+        logger.error(f"Error streaming NDJSON export after {rows} rows: {e}")
+        raise
+    finally:
+        count_rows(rows)
+        if count_task and not count_task.done():
+            count_task.cancel()
+
+    meta = {
+        "total": total_count,
+        "total_estimated": params.count == CountMode.ESTIMATE and not params.export_all,
+        "limit": None if params.export_all else params.limit,
+        "offset": None if params.export_all else params.offset,
+        "next_cursor": _build_next_cursor(params, total_count, rows, last_record),
+        "next": None,
+        "previous": None,
+    }
+    if base_url and not params.export_all:
+        meta["next"], meta["previous"] = _build_pagination_links(
+            params, base_url, _has_more_results(params, total_count, rows), meta["next_cursor"]
         )
+    lines.append(dumps({"_meta": meta}))
+    yield b"\n".join(lines) + b"\n"
+
+
+async def _stream_csv(
+    db: Database, params: CLEANSearchQueryParams, columns: List[CLEANColumn]
+) -> AsyncGenerator[str, None]:
+    """Stream search results as CSV, one chunk of rows at a time."""
+    chunk_size = settings.STREAMING_CHUNK_SIZE
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow([column.value for column in columns])
+
+    rows = 0
+    try:
+        async for record in iterate_filtered_data(
+            db, params, columns, paginate=not params.export_all, prefetch=chunk_size
+        ):
+            writer.writerow(record.values())
+            rows += 1
+            if rows % chunk_size == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+    except Exception as e:
+        # The response has already started, so the error can only be logged
+        logger.error(f"Error streaming CSV export after {rows} rows: {e}")
+        raise
+    finally:
+        count_rows(rows)
+
+    yield output.getvalue()
 
 
-@router.get("/search", summary="Get enzyme function data")
+@router.get("/search", summary="Get enzyme function data", response_model=CLEANSearchResponse)
 async def get_data(
     params: CLEANSearchQueryParams = Depends(parse_query_params),
     db: Database = Depends(get_db),
@@ -114,8 +408,28 @@ metadata and CLEAN prediction confidence ranges.
 Filters that accept multiple values on the same parameter (e.g. `organism`) are combined
 with OR logic, while filters on different parameters are combined with AND logic.
 
-The response format can be either JSON (default) or CSV. Results are automatically
-paginated when no explicit `limit` is provided.
+The response format can be JSON (default), CSV, NDJSON, Arrow or Parquet. Results are
+automatically paginated when no explicit `limit` is provided.
+
+NDJSON (`format=ndjson`) streams one record per line as rows arrive from the database,
+followed by a final `{"_meta": {...}}` line with `total`, `next_cursor` and `next`.
+
+CSV exports are streamed from the database as rows arrive. Use `columns` to pick the exported
+columns and `export_all=true` to export every matching record regardless of `limit`.
+
+Use `fields` to return only some fields of each JSON or NDJSON record, e.g.
+`fields=accession&fields=predicted_ec`. Only the columns needed for those fields are read
+from the database, so leaving out `sequence` and `function` makes responses much smaller.
+
+For bulk consumers, `format=arrow` (Arrow IPC stream) and `format=parquet` return columnar data
+with the same `columns` names as CSV; predicted EC numbers and confidence scores are list columns.
+
+The `count` parameter controls how `total` is computed: `exact` (default) runs a full count,
+`estimate` returns the query planner's row estimate, and `none` skips counting entirely. The
+count and the page are fetched concurrently.
+
+For deep paging, pass the `next_cursor` value of a page as `cursor` to switch to keyset
+pagination: each page then costs about the same as the first one, regardless of depth.
 
 ### URL examples
 
@@ -125,6 +439,14 @@ paginated when no explicit `limit` is provided.
 
 - /api/v1/search?curation_status=reviewed&format=csv&limit=100
 
+- /api/v1/search?ec_number=1.1.1.-&format=csv&export_all=true&columns=accession&columns=clean_ec_number_array
+
+- /api/v1/search?organism=Escherichia%20coli&format=ndjson&limit=10000
+
+- /api/v1/search?ec_number=1.1.1.1&fields=accession&fields=organism&fields=predicted_ec
+
+- /api/v1/search?curation_status=unreviewed&limit=1000&cursor=&lt;next_cursor of previous page&gt;
+
 ### Python example: retrieving JSON data
 
 ```python
@@ -201,120 +523,178 @@ if response.status_code == 200:
 else:
     print(f"Error: {response.status_code} - {response.text}")
 ```
+
+### Python example: loading predictions as an Arrow table
+
+```python
+import pyarrow as pa
+import requests
+
+params = {
+    "curation_status": "reviewed",
+    "format": "arrow",
+    "export_all": True,
+    "columns": ["accession", "clean_ec_number_array", "clean_ec_confidence_array"],
+}
+
+response = requests.get(
+    "https://fastapi.cleandb.mmli2.ncsa.illinois.edu/api/v1/search",
+    params=params,
+)
+
+if response.status_code == 200:
+    table = pa.ipc.open_stream(response.content).read_all()
+    print(f"Loaded {table.num_rows} rows")
+    print(table.schema)
+else:
+    print(f"Error: {response.status_code} - {response.text}")
+```
     """
 
+    base_url = str(request.url).split("?")[0] if request else None
+    return await _search(db, params, base_url)
+
+
+@router.post("/search/bulk", summary="Get enzyme function data for large lists of identifiers", response_model=CLEANSearchResponse)
+async def post_bulk_search(
+    body: CLEANBulkSearchRequest,
+    db: Database = Depends(get_db),
+) -> CLEANSearchResponse:
+    r"""
+Get enzyme records for large lists of UniProt accessions, UniProt IDs or gene names.
+
+Takes the same filters and options as `GET /search`, as a JSON body instead of query parameters,
+so that thousands of identifiers can be looked up in a single request. Each identifier list is
+matched as a single array parameter, so the query is the same regardless of the list size. Up to
+`BULK_MAX_IDS` identifiers are accepted per request, across all lists.
+
+Responses have the same shape as `GET /search`, except that `next` and `previous` links are not
+set: page through results by posting the same body with `cursor` set to `next_cursor`.
+
+### Python example
+
+```python
+import requests
+
+response = requests.post(
+    "https://fastapi.cleandb.mmli2.ncsa.illinois.edu/api/v1/search/bulk",
+    json={
+        "accession": accessions,          # e.g. tens of thousands of UniProt accessions
+        "format": "ndjson",
+        "export_all": True,
+        "count": "none",
+    },
+)
+for line in response.iter_lines():
+    ...
+```
+    """
+    with observe_phase("param_parsing"):
+        try:
+            ids = sum(len(values or []) for values in (body.accession, body.uniprot, body.gene_name))
+            if ids > settings.BULK_MAX_IDS:
+                raise ValueError(f"Too many identifiers ({ids}), at most {settings.BULK_MAX_IDS} are allowed")
+            params = _build_search_params(**body.model_dump())
+        except Exception as e:
+            logger.error(f"Error parsing bulk search request: {e}")
+            raise HTTPException(
+                status_code=400, detail=f"Invalid request: {str(e)}"
+            )
+
+    return await _search(db, params, None)
+
+
+async def _search(
+    db: Database, params: CLEANSearchQueryParams, base_url: Optional[str]
+) -> Response:
+    """Run a search and build the response in the requested format.
+
+    Pagination links are only added when base_url is given.
+    """
     try:
         # Apply default page size if no explicit limit provided
         if params.limit is None:
             params.limit = settings.AUTO_PAGINATION_THRESHOLD
 
-        # Get total count for the query (without pagination)
-        total_count = await get_total_count(db, params)
+        # Handle streaming formats
+        if params.format == ResponseFormat.NDJSON:
+            return StreamingResponse(
+                _stream_ndjson(db, params, base_url),
+                media_type="application/x-ndjson",
+            )
 
-        # Get data from database
-        data = await get_filtered_data(db, params)
+        # Columnar and CSV exports do not need the total count
+        columns = (
+            [CLEANColumn(column) for column in params.columns]
+            if params.columns
+            else list(SEARCH_COLUMNS)
+        )
 
-        # Handle response format
-        if params.format == ResponseFormat.CSV:
-            # Create CSV response
-            output = StringIO()
-
-            # Determine columns to include in CSV
-            if params.columns:
-                fieldnames = params.columns
-            elif data and len(data) > 0:
-                fieldnames = list(data[0].keys())
-            else:
-                fieldnames = []
-
-            # Write CSV
-            writer = csv.DictWriter(
-                output, fieldnames=fieldnames, extrasaction="ignore"
+        if params.format in (ResponseFormat.ARROW, ResponseFormat.PARQUET):
+            schema = get_arrow_schema(columns)
+            batches = iterate_record_batches(
+                db,
+                params,
+                columns,
+                paginate=not params.export_all,
+                batch_size=settings.STREAMING_CHUNK_SIZE,
+            )
+            if params.format == ResponseFormat.ARROW:
+                return StreamingResponse(
+                    stream_arrow_ipc(batches, schema),
+                    media_type="application/vnd.apache.arrow.stream",
+                    headers={"Content-Disposition": "attachment; filename=CLEAN_data.arrow"},
+                )
+            return StreamingResponse(
+                stream_parquet(batches, schema, settings.PARQUET_ROW_GROUP_SIZE),
+                media_type="application/vnd.apache.parquet",
+                headers={"Content-Disposition": "attachment; filename=CLEAN_data.parquet"},
             )
-            writer.writeheader()
-            for row in data:
-                writer.writerow(row)
 
-            # Return streaming response
-            output.seek(0)
+        if params.format == ResponseFormat.CSV:
             return StreamingResponse(
-                iter([output.getvalue()]),
+                _stream_csv(db, params, columns),
                 media_type="text/csv",
                 headers={"Content-Disposition": "attachment; filename=CLEAN_data.csv"},
             )
-        else:
-            response = CLEANSearchResponse(
+
+        # Get data and total count (without pagination) from database
+        data, total_count = await get_filtered_data_and_count(db, params)
+
+        # Rows come straight from the database, so they are serialized without building a
+        # CLEANSearchResponse; the response_model only documents the schema
+        with observe_phase("row_conversion"):
+            rows = [record_to_data(record, params.fields) for record in data]
+        count_rows(len(rows))
+
+        # Cursor for the next page, built from the sort key of the last row
+        next_cursor = _build_next_cursor(
+            params, total_count, len(data), data[-1] if data else None
+        )
+
+        # Add pagination links
+        next_url = previous_url = None
+        if base_url:
+            next_url, previous_url = _build_pagination_links(
+                params, base_url, _has_more_results(params, total_count, len(data)), next_cursor
+            )
+
+        with observe_phase("serialization"):
+            body = search_response_json(
+                rows,
                 total=total_count,
-                offset=params.offset,
+                total_estimated=params.count == CountMode.ESTIMATE,
                 limit=params.limit,
-                data=[CLEANDataBase(
-                    predictions_uniprot_annot_id=record["predictions_uniprot_annot_id"],
-                    uniprot=record["uniprot_id"],
-                    curation_status=record["curation_status"],
-                    accession=record["accession"],
-                    protein=record["protein_name"],
-                    organism=record["organism"],
-                    ncbi_tax_id=record["ncbi_taxid"],
-                    amino_acids=record["amino_acids"],
-                    sequence=record["protein_sequence"],
-                    function=record["enzyme_function"],
-                    gene_name=record["gene_name"],
-                    predicted_ec=[
-                        {
-                            "ec_number": ec,
-                            "score": conf
-                        }
-                        for ec, conf in zip(record["clean_ec_number_array"], record["clean_ec_confidence_array"])
-                    ],
-                    annot_ec_number_array=record["annot_ec_number_array"]
-                ) for record in data],
+                offset=params.offset,
+                next=next_url,
+                previous=previous_url,
+                next_cursor=next_cursor,
             )
+        return Response(body, media_type="application/json")
 
-            # Add pagination links
-            if request:
-                base_url = str(request.url).split("?")[0]
-
-                # Prepare query parameters for pagination links
-                query_params = {
-                    k: v
-                    for k, v in params.model_dump().items()
-                    if k not in ["auto_paginated", "offset", "limit"]
-                    and v is not None
-                }
-
-                # Set format explicitly if it was provided
-                if params.format != ResponseFormat.JSON:
-                    query_params["format"] = params.format
-
-                current_offset = params.offset or 0
-                current_limit = params.limit
-
-                # Next page link if there are more records
-                if current_offset + current_limit < total_count:
-                    next_offset = current_offset + current_limit
-                    next_params = {
-                        **query_params,
-                        "offset": next_offset,
-                        "limit": current_limit,
-                    }
-                    response.next = (
-                        f"{base_url}?{urlencode(next_params, doseq=True)}"
-                    )
-
-                # Previous page link if not on first page
-                if current_offset > 0:
-                    prev_offset = max(0, current_offset - current_limit)
-                    prev_params = {
-                        **query_params,
-                        "offset": prev_offset,
-                        "limit": current_limit,
-                    }
-                    response.previous = (
-                        f"{base_url}?{urlencode(prev_params, doseq=True)}"
-                    )
-
-            return response
-
+    except ValueError as e:
+        logger.error(f"Error getting data: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting data: {e}")
         raise HTTPException(status_code=500, detail=f"Error retrieving data: {str(e)}")
@@ -335,6 +715,10 @@ def parse_typeahead_params(
     offset: Optional[int] = Query(
         0, description="Number of records to skip"
     ),
+    order: TypeaheadOrder = Query(
+        TypeaheadOrder.ALPHABETICAL,
+        description="Order of the suggestions: alphabetical, or closest to the search term first",
+    ),
     # Search context filters
     accession: Optional[List[str]] = Query(
         None, description="Filter typeahead results by accession"
@@ -368,28 +752,30 @@ def parse_typeahead_params(
     ),
 ) -> CLEANTypeaheadQueryParams:
     """Parse and validate query parameters."""
-    try:
-        return CLEANTypeaheadQueryParams(
-            field_name=field_name,
-            search=search,
-            limit=limit,
-            offset=offset,
-            accession=accession,
-            organism=organism,
-            protein_name=protein,
-            gene_name=gene_name,
-            clean_ec_number=ec_number,
-            uniprot_id=uniprot,
-            curation_status=curation_status,
-            clean_ec_confidence_min=clean_ec_confidence_min,
-            clean_ec_confidence_max=clean_ec_confidence_max,
-            sequence_length=sequence_length,
-        )
-    except Exception as e:
-        logger.error(f"Error parsing query parameters: {e}")
-        raise HTTPException(
-            status_code=400, detail=f"Invalid query parameters: {str(e)}"
-        )
+    with observe_phase("param_parsing"):
+        try:
+            return CLEANTypeaheadQueryParams(
+                field_name=field_name,
+                search=search,
+                limit=limit,
+                offset=offset,
+                order=order,
+                accession=accession,
+                organism=organism,
+                protein_name=protein,
+                gene_name=gene_name,
+                clean_ec_number=ec_number,
+                uniprot_id=uniprot,
+                curation_status=curation_status,
+                clean_ec_confidence_min=clean_ec_confidence_min,
+                clean_ec_confidence_max=clean_ec_confidence_max,
+                sequence_length=sequence_length,
+            )
+        except Exception as e:
+            logger.error(f"Error parsing query parameters: {e}")
+            raise HTTPException(
+                status_code=400, detail=f"Invalid query parameters: {str(e)}"
+            )
 
 
 def _build_search_context(params: CLEANTypeaheadQueryParams) -> Optional[dict]:
@@ -418,7 +804,7 @@ def _build_search_context(params: CLEANTypeaheadQueryParams) -> Optional[dict]:
     return context if context else None
 
 
-@router.get("/typeahead", summary="Get typeahead suggestions for searching the database of predicted EC numbers.")
+@router.get("/typeahead", summary="Get typeahead suggestions for searching the database of predicted EC numbers.", response_model=CLEANTypeaheadResponse)
 async def get_typeahead(
     params: CLEANTypeaheadQueryParams = Depends(parse_typeahead_params),
     db: Database = Depends(get_db),
@@ -433,6 +819,9 @@ Use `field_name` to choose which column to search (`accession`, `organism`, `pro
 Optionally pass any of the `/search` filter parameters (e.g. `organism`, `curation_status`,
 `clean_ec_confidence_min`) to scope the suggestions to records that already match those filters.
 
+Suggestions are sorted alphabetically. With `order=similarity`, the closest matches to the search
+term come first instead (e.g. "Kinase" before "Adenylate kinase" for `search=kinase`).
+
 ### URL examples
 
 - /api/v1/typeahead?field_name=organism&search=esch
@@ -492,7 +881,7 @@ else:
         offset = params.offset or 0
 
         # Get data from database
-        matches, total = await get_typeahead_suggestions(db, params)
+        matches, total, total_capped = await get_typeahead_suggestions(db, params)
 
         # Build search context
         search_context = _build_search_context(params)
@@ -510,6 +899,8 @@ else:
                 "search": params.search,
                 "limit": limit,
             }
+            if params.order != TypeaheadOrder.ALPHABETICAL:
+                base_params["order"] = params.order.value
 
             # Add context params if present
             if params.accession:
@@ -533,8 +924,8 @@ else:
             if params.sequence_length:
                 base_params["sequence_length"] = params.sequence_length
 
-            # Next page
-            if offset + limit < total:
+            # Next page (a capped total means there are more matches than counted)
+            if total_capped or offset + limit < total:
                 next_params = {**base_params, "offset": offset + limit}
                 next_url = f"{base_url}?{urlencode(next_params, doseq=True)}"
 
@@ -544,23 +935,157 @@ else:
                 prev_params = {**base_params, "offset": prev_offset}
                 previous_url = f"{base_url}?{urlencode(prev_params, doseq=True)}"
 
-        return CLEANTypeaheadResponse(
-            field_name=params.field_name,
-            search=params.search,
-            matches=matches,
-            search_context=search_context,
-            total=total,
-            limit=limit,
-            offset=offset,
-            next=next_url,
-            previous=previous_url,
-        )
+        with observe_phase("row_conversion"):
+            response = CLEANTypeaheadResponse(
+                field_name=params.field_name,
+                search=params.search,
+                order=params.order,
+                matches=matches,
+                search_context=search_context,
+                total=total,
+                total_capped=total_capped,
+                limit=limit,
+                offset=offset,
+                next=next_url,
+                previous=previous_url,
+            )
+        count_rows(len(matches))
+
+        with observe_phase("serialization"):
+            return Response(response.model_dump_json(), media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error getting data: {e}")
         raise HTTPException(status_code=500, detail=f"Error retrieving data: {str(e)}")
 
 
+def parse_facet_params(
+    facets: Optional[List[FacetName]] = Query(
+        None,
+        description="Facets to compute (all facets if not provided)",
+    ),
+    limit: int = Query(
+        20, ge=1, le=1000, description="Maximum number of values returned for the organism and each EC level facet"
+    ),
+    bins: int = Query(
+        10, ge=1, le=100, description="Number of bins of the sequence length and confidence histograms"
+    ),
+    # Filters, as for search
+    accession: Optional[List[str]] = Query(
+        None, description="Filter facets by accession"
+    ),
+    organism: Optional[List[str]] = Query(
+        None, description="Filter facets by organism"
+    ),
+    protein: Optional[List[str]] = Query(
+        None, description="Filter facets by protein name"
+    ),
+    gene_name: Optional[List[str]] = Query(
+        None, description="Filter facets by gene name"
+    ),
+    ec_number: Optional[List[str]] = Query(
+        None, description="Filter facets by CLEAN EC number"
+    ),
+    uniprot: Optional[List[str]] = Query(
+        None, description="Filter facets by uniprot ID"
+    ),
+    curation_status: Optional[List[str]] = Query(
+        None, description="Filter facets by curation status"
+    ),
+    clean_ec_confidence_min: Optional[float] = Query(
+        None, description="Filter facets by minimum CLEAN EC confidence"
+    ),
+    clean_ec_confidence_max: Optional[float] = Query(
+        None, description="Filter facets by maximum CLEAN EC confidence"
+    ),
+    sequence_length: Optional[str] = Query(
+        None, description="Filter facets by minimum sequence length"
+    ),
+) -> CLEANFacetQueryParams:
+    """Parse and validate query parameters."""
+    with observe_phase("param_parsing"):
+        try:
+            return CLEANFacetQueryParams(
+                facets=facets or list(FacetName),
+                limit=limit,
+                bins=bins,
+                accession=accession,
+                organism=organism,
+                protein_name=protein,
+                gene_name=gene_name,
+                clean_ec_number=ec_number,
+                uniprot_id=uniprot,
+                curation_status=curation_status,
+                clean_ec_confidence_min=clean_ec_confidence_min,
+                clean_ec_confidence_max=clean_ec_confidence_max,
+                sequence_length=sequence_length,
+            )
+        except Exception as e:
+            logger.error(f"Error parsing query parameters: {e}")
+            raise HTTPException(
+                status_code=400, detail=f"Invalid query parameters: {str(e)}"
+            )
+
+
+@router.get("/facets", summary="Get facet counts of the records matching the filters", response_model=CLEANFacetsResponse)
+async def get_facets_data(
+    params: CLEANFacetQueryParams = Depends(parse_facet_params),
+    db: Database = Depends(get_db),
+) -> CLEANFacetsResponse:
+    r"""
+Get grouped counts of the records matching the same filters as `/search`, without transferring
+the records themselves. Available facets are:
+
+- `predicted_ec`: records per CLEAN predicted EC class at each level of the EC hierarchy
+  (e.g. 1, 1.1, 1.1.1 and 1.1.1.1), with class names. A record is counted once per class,
+  even if several of its predictions fall in it.
+- `organism`: most frequent organisms, and the number of distinct organisms.
+- `curation_status`: records per curation status. Also sets `total`.
+- `sequence_length`: histogram of sequence lengths over the range of the matching records.
+- `clean_ec_confidence`: histogram of the highest CLEAN prediction confidence, from 0 to 1.
+
+`limit` is the number of values returned for `organism` and each EC level, and `bins` the number
+of histogram bins. Facets of all records with the default options are precomputed.
+
+### URL example
+
+- /api/v1/facets?organism=Homo+sapiens&facets=predicted_ec&facets=curation_status
+
+### Python example
+
+```python
+import requests
+
+response = requests.get(
+    "https://fastapi.cleandb.mmli2.ncsa.illinois.edu/api/v1/facets",
+    params={
+        "organism": "Homo sapiens",
+        "facets": ["predicted_ec", "curation_status"],
+        "limit": 5,
+    },
+)
+
+if response.status_code == 200:
+    facets = response.json()
+    print(f"{facets['total']} records")
+    for ec_class in facets["predicted_ec"]["level_1"]:
+        print(f"{ec_class['value']:>3}  {ec_class['name']}: {ec_class['count']}")
+else:
+    print(f"Error: {response.status_code} - {response.text}")
+```
+    """
+    try:
+        facets = await get_facets(db, params)
+
+        with observe_phase("serialization"):
+            response = CLEANFacetsResponse(**facets)
+            return Response(response.model_dump_json(), media_type="application/json")
+
+    except Exception as e:
+        logger.error(f"Error getting facets: {e}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving data: {str(e)}")
+
+
 @router.get("/curation-statuses", summary="Get available curation status options")
 async def get_curation_statuses() -> CLEANCurationStatusResponse:
     r"""
@@ -605,17 +1130,18 @@ def parse_ec_lookup_params(
     )
 ) -> CLEANECLookupQueryParams:
     """Parse and validate query parameters."""
-    try:
-        return CLEANECLookupQueryParams(
-            search=search,
-        )
-    except Exception as e:
-        logger.error(f"Error parsing query parameters: {e}")
-        raise HTTPException(
-            status_code=400, detail=f"Invalid query parameters: {str(e)}"
-        )
+    with observe_phase("param_parsing"):
+        try:
+            return CLEANECLookupQueryParams(
+                search=search,
+            )
+        except Exception as e:
+            logger.error(f"Error parsing query parameters: {e}")
+            raise HTTPException(
+                status_code=400, detail=f"Invalid query parameters: {str(e)}"
+            )
 
-@router.get("/ec_lookup", summary="Look up EC numbers or classes")
+@router.get("/ec_lookup", summary="Look up EC numbers or classes", response_model=CLEANECLookupResponse)
 
 async def get_ec_lookup(
     params: CLEANECLookupQueryParams = Depends(parse_ec_lookup_params),
@@ -659,10 +1185,15 @@ else:
         # Get data from database
         data = await get_ec_suggestions(db, params)
 
-        return CLEANECLookupResponse(
-            search=params.search,
-            matches=[CLEANECLookupMatch(ec_number=item["ec_number"], ec_name=item["ec_name"]) for item in data]
-        )
+        with observe_phase("row_conversion"):
+            response = CLEANECLookupResponse(
+                search=params.search,
+                matches=[CLEANECLookupMatch(ec_number=item["ec_number"], ec_name=item["ec_name"]) for item in data]
+            )
+        count_rows(len(data))
+
+        with observe_phase("serialization"):
+            return Response(response.model_dump_json(), media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error getting data: {e}")
@@ -0,0 +1,101 @@
+"""Benchmark the CPU cost per row of serializing a JSON /search page.
+
+Compares the previous path (a CLEANDataBase model per row inside a CLEANSearchResponse,
+serialized with model_dump_json) with the direct orjson path used by the endpoint, on
+synthetic rows shaped like the search query results. Checks that both produce the same
+document. No database is needed.
+
+Usage:
+    python -m benchmarks.bench_serialization --rows 5000 --repeat 20
+"""
+import argparse
+import json
+import random
+import string
+import time
+
+from app.core.serialization import record_to_data, search_response_json
+from app.models.clean_data import CLEANDataBase, CLEANSearchResponse
+
+
+def make_rows(count: int, seed: int = 0) -> list[dict]:
+    """Generate rows with the columns, types and typical sizes of the search query."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        length = rng.randint(50, 1000)
+        predictions = rng.randint(1, 4)
+        rows.append({
+            "predictions_uniprot_annot_id": i + 1,
+            "uniprot_id": f"ID{i}_HUMAN",
+            "curation_status": rng.choice(["reviewed", "unreviewed"]),
+            "accession": f"P{i:05d}",
+            "protein_name": f"Protein {rng.randint(1, 5000)}",
+            "organism": f"Organism {rng.randint(1, 300)}",
+            "ncbi_taxid": rng.randint(1, 100000),
+            "amino_acids": length,
+            "protein_sequence": "".join(rng.choices(string.ascii_uppercase, k=length)),
+            "enzyme_function": "Catalyzes a reaction. " * rng.randint(0, 5) or None,
+            "gene_name": f"gene{rng.randint(1, 3000)}",
+            "clean_ec_number_array": [
+                f"{rng.randint(1, 7)}.{rng.randint(1, 20)}.{rng.randint(1, 20)}.{rng.randint(1, 200)}"
+                for _ in range(predictions)
+            ],
+            "clean_ec_confidence_array": [rng.random() for _ in range(predictions)],
+            "annot_ec_number_array": None if rng.random() < 0.5 else ["1.1.1.1"],
+            "max_clean_ec_confidence": rng.random(),
+        })
+    return rows
+
+
+def serialize_with_models(rows: list[dict]) -> bytes:
+    response = CLEANSearchResponse(
+        total=len(rows),
+        total_estimated=False,
+        offset=0,
+        limit=len(rows),
+        data=[CLEANDataBase(**record_to_data(row)) for row in rows],
+    )
+    return response.model_dump_json().encode()
+
+
+def serialize_direct(rows: list[dict]) -> bytes:
+    return search_response_json(
+        [record_to_data(row) for row in rows],
+        total=len(rows),
+        total_estimated=False,
+        limit=len(rows),
+        offset=0,
+    )
+
+
+def cpu_seconds_per_row(serialize, rows: list[dict], repeat: int) -> float:
+    """Best CPU time per row over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        serialize(rows)
+        best = min(best, time.process_time() - start)
+    return best / len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per path (the best one is reported)")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    if json.loads(serialize_with_models(rows)) != json.loads(serialize_direct(rows)):
+        raise SystemExit("The two paths produce different documents")
+
+    models = cpu_seconds_per_row(serialize_with_models, rows, args.repeat)
+    direct = cpu_seconds_per_row(serialize_direct, rows, args.repeat)
+    print(f"{args.rows} rows per page, best of {args.repeat}")
+    print(f"  pydantic models: {models * 1e6:8.2f} us/row")
+    print(f"  direct orjson:   {direct * 1e6:8.2f} us/row")
+    print(f"  speedup:         {models / direct:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Drive the API with a recorded query mix and report latency, throughput and per-phase timings.
+
+Requests are drawn from the mix (benchmarks/query_mix.json) by weight with a seeded random
+generator, so every run sends the same requests in the same order, and sent by concurrent
+workers. The report, written as JSON, has:
+
+- overall and per-request-name latency percentiles (p50, p95, p99), error counts and throughput,
+- mean time per route and phase from the API's /metrics (param_parsing, data_query, ...),
+- the change of the API's counters (cache hits, coalesced queries, ...) during the run,
+
+so runs of different commits can be compared, e.g. with --baseline.
+
+By default the API runs in-process (the CLEAN_DB_* environment variables must point at the
+benchmark database, see benchmarks.generate_data); use --base-url to benchmark a running server.
+The result cache makes repeated requests cheap, so set CACHE_ENABLED=false to measure the
+database paths.
+
+Usage:
+    python -m benchmarks.run_benchmark --requests 5000 --concurrency 16 --output report.json
+    python -m benchmarks.run_benchmark --base-url http://localhost:8000 --baseline report.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+DEFAULT_MIX = Path(__file__).with_name("query_mix.json")
+
+MetricsSnapshot = Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]
+
+
+@asynccontextmanager
+async def api_client(base_url: Optional[str], timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    """Client for a running server, or for the app run in-process with its lifespan."""
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+            yield client
+        return
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+            yield client
+
+
+async def scrape_metrics(client: httpx.AsyncClient) -> MetricsSnapshot:
+    """Get the current value of every sample exported by /metrics."""
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+def metrics_report(before: MetricsSnapshot, after: MetricsSnapshot) -> Dict[str, Any]:
+    """Summarize the change of the API metrics between two snapshots."""
+    delta = {key: value - before.get(key, 0.0) for key, value in after.items()}
+
+    phases: Dict[str, Dict[str, dict]] = defaultdict(dict)
+    for (name, labels), count in delta.items():
+        if name != "cleandb_request_phase_duration_seconds_count" or not count:
+            continue
+        labels_dict = dict(labels)
+        total = delta[("cleandb_request_phase_duration_seconds_sum", labels)]
+        phases[labels_dict["route"]][labels_dict["phase"]] = {
+            "count": int(count),
+            "mean_ms": round(total / count * 1000, 3),
+            "total_ms": round(total * 1000, 3),
+        }
+
+    counters = {
+        name + "{" + ",".join(f"{key}={value}" for key, value in labels) + "}": value
+        for (name, labels), value in sorted(delta.items())
+        if name.endswith("_total") and name.startswith("cleandb_") and value
+    }
+    return {"phases": dict(phases), "counters": counters}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))]
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, Any]:
+    values = sorted(round(latency, 3) for latency in latencies_ms)
+    return {
+        "mean_ms": round(sum(values) / len(values), 3) if values else None,
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": values[-1] if values else None,
+    }
+
+
+def build_schedule(mix: List[dict], count: int, seed: int) -> List[dict]:
+    """Draw count requests from the mix by weight."""
+    rng = random.Random(seed)
+    return rng.choices(mix, weights=[entry.get("weight", 1) for entry in mix], k=count)
+
+
+async def send(client: httpx.AsyncClient, entry: dict) -> Tuple[float, int, int]:
+    """Send a request of the mix and read the whole response; returns (latency ms, status, bytes)."""
+    start = time.perf_counter()
+    response = await client.request(
+        entry.get("method", "GET"), entry["path"], params=entry.get("params"), json=entry.get("json")
+    )
+    body = await response.aread()
+    return (time.perf_counter() - start) * 1000, response.status_code, len(body)
+
+
+async def run_schedule(
+    client: httpx.AsyncClient, schedule: List[dict], concurrency: int
+) -> Tuple[List[Tuple[str, float, int, int]], float]:
+    """Send the scheduled requests from concurrent workers; returns the results and the wall time."""
+    requests = iter(schedule)
+    results = []
+
+    async def worker() -> None:
+        for entry in requests:
+            try:
+                latency_ms, status, size = await send(client, entry)
+            except httpx.HTTPError as e:
+                print(f"{entry['name']}: {e!r}", file=sys.stderr)
+                latency_ms, status, size = 0.0, 0, 0
+            results.append((entry["name"], latency_ms, status, size))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = json.loads(Path(args.mix).read_text())
+    schedule = build_schedule(mix, args.requests, args.seed)
+    warmup = build_schedule(mix, args.warmup, args.seed + 1)
+
+    async with api_client(args.base_url, args.timeout) as client:
+        dataset_size = (await client.get("/api/v1/search", params={"limit": 1})).json().get("total")
+        await run_schedule(client, warmup, args.concurrency)
+
+        before = await scrape_metrics(client)
+        results, wall_seconds = await run_schedule(client, schedule, args.concurrency)
+        after = await scrape_metrics(client)
+
+    by_name = defaultdict(list)
+    for result in results:
+        by_name[result[0]].append(result)
+
+    def summary(rows: List[Tuple[str, float, int, int]]) -> Dict[str, Any]:
+        ok = [latency for _, latency, status, _ in rows if 200 <= status < 400]
+        # Latencies are those of successful requests
+        return {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            **latency_summary(ok),
+            "bytes_mean": round(sum(size for *_, size in rows) / len(rows)) if rows else 0,
+        }
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or "in-process",
+            "mix": str(args.mix),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "dataset_size": dataset_size,
+        },
+        "overall": {**summary(results), "throughput_rps": round(len(results) / wall_seconds, 2)},
+        "by_name": {name: summary(rows) for name, rows in sorted(by_name.items())},
+        **metrics_report(before, after),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> str:
+    """Format the latency and throughput changes of report compared to baseline."""
+
+    def change(new: Optional[float], old: Optional[float]) -> str:
+        if new is None or old is None:
+            return f"{'-':>30}"
+        percent = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        return f"{old:10.2f} -> {new:8.2f} {percent:>7}"
+
+    lines = [f"{'':32} {'p50 ms':>30} {'p95 ms':>30}"]
+    rows = [("overall", report["overall"], baseline["overall"])]
+    rows += [
+        (name, stats, baseline["by_name"][name])
+        for name, stats in report["by_name"].items()
+        if name in baseline["by_name"]
+    ]
+    for name, new, old in rows:
+        lines.append(f"{name:32} {change(new['p50_ms'], old['p50_ms'])} {change(new['p95_ms'], old['p95_ms'])}")
+    lines.append(
+        f"{'throughput (requests/s)':32} "
+        f"{change(report['overall']['throughput_rps'], baseline['overall']['throughput_rps'])}"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="URL of a running API server (default: run the app in-process)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Query mix JSON file")
+    parser.add_argument("--requests", type=int, default=2000, help="Number of measured requests")
+    parser.add_argument("--warmup", type=int, default=200, help="Number of requests sent before measuring")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent clients")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the request schedule")
+    parser.add_argument("--timeout", type=float, default=120, help="Request timeout in seconds")
+    parser.add_argument("--output", default="benchmark-report.json", help="Report file")
+    parser.add_argument("--baseline", help="Report of a previous run to compare with")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args))
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    overall = report["overall"]
+    print(
+        f"{overall['requests']} requests ({overall['errors']} errors) at {overall['throughput_rps']} requests/s: "
+        f"p50 {overall['p50_ms']:.2f} ms, p95 {overall['p95_ms']:.2f} ms, p99 {overall['p99_ms']:.2f} ms"
+    )
+    print(f"Report written to {args.output}")
+    if args.baseline:
+        print(compare(report, json.loads(Path(args.baseline).read_text())))
+
+
+if __name__ == "__main__":
+    main()
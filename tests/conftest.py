@@ -0,0 +1,12 @@
+import os
+
+# The settings require the database connection variables. Unit tests do not connect, so any
+# values do; tests needing a database use their own variables and skip without them.
+for name, value in {
+    "CLEAN_DB_USER": "test",
+    "CLEAN_DB_PASSWORD": "test",
+    "CLEAN_DB_HOST": "localhost",
+    "CLEAN_DB_PORT": "5432",
+    "CLEAN_DB_NAME": "test",
+}.items():
+    os.environ.setdefault(name, value)
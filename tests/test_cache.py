@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+from app.db.cache import MemoryCacheBackend, ResultCache
+
+
+class Params(BaseModel):
+    search: str
+
+
+async def test_memory_backend_evicts_least_recently_used_above_max_bytes():
+    backend = MemoryCacheBackend(max_entries=10, max_bytes=10)
+    await backend.set("a", b"1234", ttl=60)
+    await backend.set("b", b"1234", ttl=60)
+    assert await backend.get("a") == b"1234"
+
+    await backend.set("c", b"1234", ttl=60)
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1234"
+    assert backend.size == 8
+
+
+async def test_memory_backend_skips_values_larger_than_max_bytes():
+    backend = MemoryCacheBackend(max_entries=10, max_bytes=10)
+    await backend.set("a", b"1234", ttl=60)
+    await backend.set("b", b"12345678901", ttl=60)
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1234"
+
+
+async def test_memory_backend_replaces_values_and_tracks_size():
+    backend = MemoryCacheBackend(max_entries=10, max_bytes=10)
+    await backend.set("a", b"1234", ttl=60)
+    await backend.set("a", b"12", ttl=60)
+    assert await backend.get("a") == b"12"
+    assert backend.size == 2
+
+    await backend.clear()
+    assert backend.size == 0
+
+
+async def test_result_cache_returns_results_as_json():
+    cache = ResultCache(MemoryCacheBackend(max_entries=10, max_bytes=1024), ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return [{"confidence": Decimal("0.5"), "ec": ["1.1.1.1"]}], 1
+
+    assert await cache.get_or_set("search", Params(search="abc"), fetch) == ([{"confidence": Decimal("0.5"), "ec": ["1.1.1.1"]}], 1)
+    assert await cache.get_or_set("search", Params(search="abc"), fetch) == [[{"confidence": 0.5, "ec": ["1.1.1.1"]}], 1]
+    assert len(calls) == 1
@@ -0,0 +1,133 @@
+import re
+from typing import Any, List, Tuple
+
+import pytest
+
+from app.db.filters import compile_filter, compile_params
+from app.db.queries import _get_typeahead_suggestions, build_conditions
+from app.models.query_params import CLEANSearchQueryParams, CLEANTypeaheadQueryParams
+
+# Filter values that search and typeahead share, by field name
+FILTERS = [
+    {"accession": ["p12345", "Q67890"]},
+    {"organism": ["Homo sapiens"], "curation_status": ["Reviewed"]},
+    {"clean_ec_number": ["1.1.1.1", "2.7.-.-", "3.-.-.-"]},
+    {"clean_ec_confidence_min": 0.5, "clean_ec_confidence_max": 0.9},
+    {"protein_name": ["Kinase"], "gene_name": ["adhA"], "uniprot_id": ["ADH1_HUMAN"], "sequence_length": "300"},
+    {
+        "accession": ["P12345"], "protein_name": ["Kinase"], "organism": ["Homo sapiens"], "gene_name": ["adhA"],
+        "uniprot_id": ["ADH1_HUMAN"], "clean_ec_number": ["1.1.1.1"], "clean_ec_confidence_min": 0.1,
+        "clean_ec_confidence_max": 0.9, "sequence_length": "100", "curation_status": ["reviewed"],
+    },
+]
+
+
+class RecordingDatabase:
+    """Stands in for Database, recording the queries run instead of running them."""
+
+    def __init__(self):
+        self.extensions = set()
+        self.populated_views = set()
+        self.queries: List[Tuple[str, Tuple[Any, ...]]] = []
+
+    async def fetch(self, query: str, *args):
+        self.queries.append((query, args))
+        return [{"total": 0, "matches": []}]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_search_and_typeahead_compile_the_same_filters(filters):
+    search, search_args = compile_params(CLEANSearchQueryParams(**filters))
+    typeahead, typeahead_args = compile_params(CLEANTypeaheadQueryParams(field_name="organism", search="hom", **filters))
+
+    assert search.where_clause == typeahead.where_clause
+    assert search_args == typeahead_args
+    assert (search.where_clause, search_args) == build_conditions(CLEANSearchQueryParams(**filters))
+
+
+def test_filters_of_the_same_shape_share_the_compiled_filter():
+    first, first_args = compile_params(CLEANSearchQueryParams(organism=["Homo sapiens"], clean_ec_number=["1.-.-.-"]))
+    second, second_args = compile_params(CLEANTypeaheadQueryParams(
+        field_name="gene_name", search="adh", organism=["Mus musculus"], clean_ec_number=["2.-.-.-"],
+    ))
+
+    assert first is second
+    assert first_args == [["homo sapiens"], [], "1.%"]
+    assert second_args == [["mus musculus"], [], "2.%"]
+
+
+def test_shape_depends_on_number_of_ec_patterns():
+    one, _ = compile_params(CLEANSearchQueryParams(clean_ec_number=["1.-.-.-"]))
+    two, _ = compile_params(CLEANSearchQueryParams(clean_ec_number=["1.-.-.-", "2.-.-.-"]))
+
+    assert one is not two
+    assert two.where_clause.count("LIKE") == 2
+
+
+def test_no_filters():
+    compiled, args = compile_params(CLEANSearchQueryParams())
+
+    assert compiled.shape == ()
+    assert compiled.where_clause == "TRUE"
+    assert args == []
+
+
+@pytest.mark.parametrize("start_param_idx", [0, 1, 5])
+def test_placeholders_are_numbered_from_start_param_idx(start_param_idx):
+    compiled, args = compile_params(
+        CLEANSearchQueryParams(organism=["Homo sapiens"], clean_ec_number=["1.1.1.1", "2.-.-.-"], sequence_length="300"),
+        start_param_idx=start_param_idx,
+    )
+
+    placeholders = [int(number) for number in re.findall(r"\$(\d+)", compiled.where_clause)]
+    assert compiled.start_param_idx == start_param_idx
+    assert placeholders == list(range(start_param_idx + 1, start_param_idx + len(args) + 1))
+
+
+def test_compile_filter_is_memoized():
+    shape = (("organism", 1), ("curation_status", 1))
+
+    assert compile_filter(shape, 1) is compile_filter(shape, 1)
+    assert compile_filter(shape, 1) is not compile_filter(shape, 0)
+
+
+def test_confidence_filters_use_the_record_maximum():
+    compiled, _ = compile_params(CLEANSearchQueryParams(clean_ec_confidence_min=0.5))
+
+    assert compiled.uses_confidence
+    assert compiled.where_clause == "puace.max_clean_ec_confidence > $1"
+
+
+@pytest.mark.parametrize("context", [
+    {"clean_ec_confidence_min": 0.5},
+    {"clean_ec_confidence_max": 0.9},
+    {"clean_ec_number": ["1.1.1.1", "2.7.-.-"]},
+    {"clean_ec_number": ["2.7.-.-"], "clean_ec_confidence_min": 0.5, "organism": ["Homo sapiens"]},
+])
+async def test_predicted_ec_typeahead_context_matches_search(context):
+    """Predicted EC typeahead applies the search filters to records, not to each prediction.
+
+    Confidence bounds apply to the maximum confidence of the record and EC number filters to any
+    prediction of the record, so the suggestions are the EC numbers of the records /search
+    returns, not only the predictions that match the context themselves.
+    """
+    params = CLEANTypeaheadQueryParams(field_name="predicted_ec", search="2.7", **context)
+    db = RecordingDatabase()
+
+    await _get_typeahead_suggestions(db, params)
+
+    (query, args), = db.queries
+    compiled, context_args = compile_params(params, start_param_idx=1)
+    assert compiled.where_clause in query
+    assert list(args[1:1 + len(context_args)]) == context_args
+    assert args[0] == "2.7%"
+    # Predictions are joined only for the suggested EC numbers
+    assert "pce.clean_ec_number LIKE $1" in query
+    assert "pce.clean_ec_confidence" not in query
+    if compiled.uses_confidence:
+        assert "INNER JOIN cleandb.predictions_uniprot_annot_clean_ec_mv01 puace" in query
+    if params.clean_ec_number:
+        assert (
+            "pua.predictions_uniprot_annot_id IN (SELECT predictions_uniprot_annot_id "
+            "FROM cleandb.predictions_uniprot_annot_clean_ec WHERE" in query
+        )
@@ -0,0 +1,85 @@
+import base64
+import json
+from decimal import Decimal
+
+import pytest
+
+from app.db.queries import decode_cursor, encode_cursor
+from app.models.query_params import CLEANSearchQueryParams
+from app.routers.search import _build_pagination_links, _build_search_params
+
+BASE_URL = "http://testserver/api/v1/search"
+
+ROW = {
+    "max_clean_ec_confidence": 0.5,
+    "amino_acids": 300,
+    "accession": "A0A0000100",
+    "organism": "Homo sapiens",
+    "curation_status": "reviewed",
+    "predictions_uniprot_annot_id": 1000,
+}
+
+
+def make_cursor(ordering: str, values: list) -> str:
+    payload = json.dumps({"o": ordering, "k": values}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def search_params(**kwargs) -> CLEANSearchQueryParams:
+    options = dict(
+        accession=None, organism=None, protein=None, gene_name=None, ec_number=None, uniprot=None,
+        curation_status=None, clean_ec_confidence_min=None, clean_ec_confidence_max=None,
+        sequence_length=None, format="json", fields=None, columns=None, export_all=False,
+        limit=20, offset=None, cursor=None, ordering=None, count="exact",
+    )
+    return _build_search_params(**{**options, **kwargs})
+
+
+@pytest.mark.parametrize("ordering", [None, "accession", "-amino_acids", "organism", "-curation_status", "predicted_ec"])
+def test_cursor_round_trip(ordering):
+    values = decode_cursor(encode_cursor(ordering, ROW), ordering)
+    assert values[-1] == ROW["predictions_uniprot_annot_id"]
+
+
+def test_cursor_keeps_decimals_and_nulls():
+    row = {**ROW, "max_clean_ec_confidence": Decimal("0.1")}
+    assert decode_cursor(encode_cursor(None, row), None) == [Decimal("0.1"), 300, 1000]
+    assert decode_cursor(make_cursor("", [None, 300, 1000]), None) == [None, 300, 1000]
+
+
+@pytest.mark.parametrize("ordering, values", [
+    ("accession", [5, 1]),
+    ("organism", ["Homo\x00sapiens", 1]),
+    ("amino_acids", ["300", 1]),
+    ("amino_acids", [2 ** 40, 1]),
+    ("amino_acids", [300.5, 1]),
+    ("", ["0.5", 300, 1]),
+    ("", [True, 300, 1]),
+    ("curation_status", ["reviewed", 2 ** 70]),
+    ("accession", ["A0A0000100"]),
+])
+def test_cursor_with_values_of_the_wrong_type_is_rejected(ordering, values):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(make_cursor(ordering, values), ordering or None)
+
+
+def test_cursor_for_another_ordering_is_rejected():
+    with pytest.raises(ValueError, match="different ordering"):
+        decode_cursor(encode_cursor("accession", ROW), "organism")
+
+
+def test_next_link_uses_cursor_without_explicit_offset():
+    next_url, previous_url = _build_pagination_links(search_params(), BASE_URL, True, "abc")
+    assert next_url == f"{BASE_URL}?cursor=abc&limit=20"
+    assert previous_url is None
+
+
+def test_next_link_uses_explicit_offset():
+    next_url, previous_url = _build_pagination_links(search_params(offset=40), BASE_URL, True, "abc")
+    assert next_url == f"{BASE_URL}?offset=60&limit=20"
+    assert previous_url == f"{BASE_URL}?offset=20&limit=20"
+
+
+def test_next_link_uses_offset_without_cursor():
+    next_url, _ = _build_pagination_links(search_params(), BASE_URL, True, None)
+    assert next_url == f"{BASE_URL}?offset=20&limit=20"